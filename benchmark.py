@@ -0,0 +1,496 @@
+"""
+Micro-benchmarks for the revenue pipeline.
+
+Usage:
+    python benchmark.py month_overlap --rows 1000 10000 100000
+    python benchmark.py loader --rows 1000 10000
+    python benchmark.py writer --employees 1000 5000 --months 3
+    python benchmark.py assembly --rows 30000 --months 12
+    python benchmark.py aggregation --rows 10000 100000
+    python benchmark.py export --employees 50000 --months 12
+    python benchmark.py streaming --rows 20000 60000 --chunk-size 5000
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from revenue_core.engine import (MONTHS, aggregate_by_employee,
+                                 days_worked_by_month)
+from revenue_core.loader import read_input_workbook
+from revenue_core.writer import FORMATS, REPORT_FORMATS, write_revenue_report
+
+
+def make_allocations(rows, seed=0, employees=None):
+    """
+    Build a synthetic Sheet1 allocation frame.
+
+    Args:
+        rows (int): Number of project rows.
+        seed (int): Random seed.
+        employees (int, optional): Number of distinct employees, a third of
+        the rows by default.
+
+    Returns:
+        pd.DataFrame: Frame with the Sheet1 columns used by process_data.
+    """
+    rng = np.random.default_rng(seed)
+    emp_id = rng.integers(100, 100 + (employees or max(rows // 3, 1)), rows)
+    start = pd.Timestamp('2023-01-01') + \
+        pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    end = start + pd.to_timedelta(rng.integers(0, 3 * 365, rows), unit='D')
+    rate_day = np.where(rng.random(rows) < 0.33,
+                        rng.integers(1000, 5000, rows), 0)
+    rate_month = np.where((rate_day == 0) & (rng.random(rows) < 0.5),
+                          rng.integers(20000, 90000, rows), 0)
+    rate_po = np.where((rate_day == 0) & (rate_month == 0),
+                       rng.integers(50000, 300000, rows), 0)
+    data = pd.DataFrame({
+        'Sr_no': np.arange(1, rows + 1),
+        'Emp_ID': emp_id,
+        'Name': ['Emp%d' % i for i in emp_id],
+        'Salary': 400000,
+        'Month_sal': 25000 + (emp_id % 7) * 1000,
+        'Project': ['Project %d' % i for i in rng.integers(0, 8, rows)],
+        'PO_No': ['PO%d' % i for i in rng.integers(0, 1000, rows)],
+        'Proj_start': start,
+        'Proj_end': end,
+        'Rate_per_day': rate_day,
+        'Rate_per_month': rate_month,
+        'Rate_PO': rate_po,
+    })
+    bench = rng.random(rows) < 0.1
+    data.loc[bench, ['Proj_start', 'Proj_end']] = pd.NaT
+    data.loc[bench, 'PO_No'] = np.nan
+    return data
+
+
+def make_expenses():
+    """
+    Build a synthetic Sheet2 operating-cost frame.
+    """
+    return pd.DataFrame([[8000, 9000, 7080, 8000, 9000, 7080, 11600]], columns=[
+        'Rent', 'Professional Fees', 'Other Operating Cost', 'Stipend Expenses',
+        'Asstes (Laptop, Headphone etc)', 'Annual Meet Expense',
+        'Taxes (Advance & SA Tax)'])
+
+
+def write_workbook(path, rows, employees=None):
+    """
+    Write a synthetic input workbook (Sheet1 + Sheet2) to path.
+    """
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        make_allocations(rows, employees=employees).to_excel(
+            writer, sheet_name='Sheet1', index=False)
+        make_expenses().to_excel(writer, sheet_name='Sheet2', index=False)
+
+
+def legacy_days_worked(data):
+    """
+    The original day-by-day loop from process_data, kept for comparison.
+    """
+    days_worked = {month: [] for month in MONTHS}
+    for index, row in data.iterrows():
+        start_date = row["Proj_start"]
+        end_date = row["Proj_end"]
+        entry_days_worked = [0] * len(MONTHS)
+        while start_date <= end_date:
+            entry_days_worked[start_date.month - 1] += 1
+            start_date += pd.DateOffset(days=1)
+        for i, month in enumerate(MONTHS):
+            days_worked[month].append(entry_days_worked[i])
+    return pd.DataFrame(days_worked)
+
+
+def make_report_frames(employees, months, seed=0, transpose=True):
+    """
+    Build synthetic r1/r2 frames shaped like get_employee_data_by_months output.
+
+    Args:
+        employees (int): Number of employee rows in r1.
+        months (int): Number of selected months.
+        seed (int): Random seed.
+        transpose (bool): Return r2 transposed as written to Excel, or as
+        the one-row table the REPORT_FORMATS writers take.
+
+    Returns:
+        tuple: (r1, r2).
+    """
+    rng = np.random.default_rng(seed)
+    r1 = pd.DataFrame({
+        'Emp_ID': np.arange(100, 100 + employees),
+        'Name': ['Emp%d' % i for i in range(employees)],
+        'Month_sal': rng.integers(25000, 35000, employees),
+        'Project': 'Project A Project B',
+        'PO_No': 'C386E9',
+        'Proj_start': '2023-01-13',
+        'Proj_end': '2023-11-26',
+    })
+    overall = {}
+    for month in MONTHS[:months]:
+        revenue = rng.uniform(0, 90000, employees).round(2)
+        r1[month] = revenue
+        r1[f"P_L_{month}"] = (revenue - r1['Month_sal']).round(2)
+        r1[f"P_L_{month}_%"] = np.where(
+            revenue > 0, (revenue - r1['Month_sal']) / revenue * 100, 0).round(2)
+        overall[month] = revenue.sum()
+        overall[f"P_L_{month}"] = revenue.sum() - 600000
+    r2 = pd.DataFrame([{**dict(zip(make_expenses().columns, [8000] * 7)),
+                        'Month_sal': 500000, 'Total_Expenses': 560000,
+                        **overall}])
+    return r1, r2.T.reset_index() if transpose else r2
+
+
+def legacy_write_report(r1, r2, target):
+    """
+    A condensed copy of the original to_excel + per-cell formatting loop
+    from process_upload, kept for comparison.
+    """
+    writer = pd.ExcelWriter(target, engine='xlsxwriter')
+    r1.to_excel(writer, index=False, sheet_name='Monthly_MIS')
+    r2.to_excel(writer, startcol=0, index=False,
+                header=False, sheet_name='Operating_Cost')
+    workbook = writer.book
+    worksheet = writer.sheets['Monthly_MIS']
+    worksheet2 = writer.sheets['Operating_Cost']
+    fmt = {name: workbook.add_format(properties)
+           for name, properties in FORMATS.items()}
+    blocks = [([7, 8, 9, 19, 20, 21, 31, 32, 33], 'green'),
+              ([10, 11, 12, 22, 23, 24, 34, 35, 36], 'purple'),
+              ([13, 14, 15, 25, 26, 27, 37, 38, 39], 'orange'),
+              ([16, 17, 18, 28, 29, 30, 40, 41, 42], 'pink')]
+    num_rows, num_cols = r1.shape
+    for col_num in range(num_cols):
+        if col_num < 7:
+            cell_value = r1.columns[col_num]
+            format_to_apply = fmt['navy_blue']
+        for columns, colour in blocks:
+            if col_num in columns:
+                cell_value = r1.columns[col_num]
+                format_to_apply = fmt[colour]
+        worksheet.write(0, col_num, cell_value, format_to_apply)
+    for col_num in range(num_cols):
+        for row_num in range(1, num_rows + 1):
+            numeric_value = pd.to_numeric(cell_value, errors='coerce')
+            cell_value = r1.iloc[row_num - 1, col_num]
+            format_to_apply = fmt['light_blue'] if col_num < 7 else None
+            for columns, colour in blocks:
+                if col_num in columns:
+                    if pd.notna(cell_value) and \
+                            pd.to_numeric(cell_value, errors='coerce') < 0:
+                        format_to_apply = fmt['ng_' + colour]
+                    else:
+                        format_to_apply = fmt['light_' + colour]
+            if format_to_apply:
+                worksheet.write(row_num, col_num, cell_value, format_to_apply)
+    worksheet2.merge_range('A1:B1', 'Operating Cost',
+                           fmt['operating_cost_title'])
+    num_rows2, num_cols2 = r2.shape
+    for col_num in range(num_cols2):
+        for row_num in range(1, num_rows2 + 1):
+            cell_value2 = r2.iloc[row_num - 1, col_num]
+            worksheet2.write(row_num, col_num, cell_value2, fmt['light_blue'])
+    writer.close()
+
+
+def legacy_month_assembly(grouped_df, months):
+    """
+    The per-month frame + double concat assembly of
+    get_employee_data_by_months as it was before the one-pass month table,
+    kept as the timing baseline. tests/test_month_table.py checks the
+    output against the original apply-based table.
+    """
+    revenue = grouped_df[months].to_numpy(dtype=float)
+    salary = grouped_df['Month_sal'].map(
+        lambda values: values[0] if len(values) == 1 else np.nan
+    ).to_numpy(dtype=float)
+    profit_loss = revenue - salary[:, None]
+    profit_loss_pct = np.divide(profit_loss * 100, revenue,
+                                out=np.zeros_like(revenue), where=revenue > 0)
+    dataframes = []
+    with pd.option_context('mode.chained_assignment', None):
+        for month_num, i in enumerate(months):
+            columns_to_fetch = ['Emp_ID', 'Name', 'Month_sal',
+                                'Project', 'PO_No', 'Proj_start', 'Proj_end'] + [i]
+            employee_data_month = grouped_df[columns_to_fetch]
+
+            employee_data_month[f"P_L_{i}"] = profit_loss[:, month_num]
+            employee_data_month[f"P_L_{i}_%"] = profit_loss_pct[:, month_num]
+
+            employee_data_month = employee_data_month.round(2)
+            dataframes.append(employee_data_month)
+    return pd.concat(dataframes, axis=1).loc[:, ~pd.concat(
+        dataframes, axis=1).columns.duplicated()]
+
+
+def legacy_operating_cost_assembly(final_df, months):
+    """
+    The Sheet2 loop that re-concatenates the growing list of frames on
+    every month, as it was before the one-pass table; the timing baseline.
+    """
+    dataframe = []
+    with pd.option_context('mode.chained_assignment', None):
+        for i in months:
+            columns_fetch = ['Rent', 'Professional Fees', 'Other Operating Cost', 'Stipend Expenses',
+                             'Asstes (Laptop, Headphone etc)', 'Annual Meet Expense', 'Taxes (Advance & SA Tax)', 'Month_sal', 'Total_Expenses'] + [i]
+            overall = final_df[columns_fetch]
+
+            overall[f"P_L_{i}"] = (overall[i] - overall['Total_Expenses'])
+            dataframe.append(overall)
+            result_df1 = pd.concat(dataframe, axis=1).loc[:, ~pd.concat(
+                dataframe, axis=1).columns.duplicated()]
+    return result_df1
+
+
+def make_revenue_rows(rows, seed=0):
+    """
+    Build the per-row monthly revenue frame process_data aggregates.
+
+    Args:
+        rows (int): Number of project rows.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: Sheet1 columns plus Monthly_revenue and one revenue
+        column per month name.
+    """
+    data = make_allocations(rows, seed)
+    revenue = data['Rate_per_day'] * 22 + data['Rate_per_month'] + \
+        data['Rate_PO'] / 12
+    fractions = days_worked_by_month(data['Proj_start'], data['Proj_end'])
+    data['Monthly_revenue'] = revenue
+    for month in MONTHS:
+        data[month] = fractions[month] / 30 * revenue
+    return data
+
+
+def legacy_aggregate(result, agg):
+    """
+    The previous groupby + 'unique' aggregation of process_data, kept as the
+    regression reference.
+    """
+    return result.groupby(['Emp_ID']).agg(agg).reset_index()
+
+
+def traced(func, *args):
+    """
+    Run func twice and return (result, seconds, peak traced bytes); the
+    timing run is untraced since tracemalloc slows every allocation down.
+    """
+    result, seconds = timed(func, *args)
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def timed(func, *args):
+    """
+    Run func once and return (result, seconds).
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def bench_month_overlap(args):
+    print(f"{'rows':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for rows in args.rows:
+        data = make_allocations(rows)
+        fast, fast_time = timed(
+            days_worked_by_month, data['Proj_start'], data['Proj_end'])
+        if rows > args.legacy_limit:
+            print(f"{rows:>8} {'skipped':>12} {fast_time:>15.4f} {'-':>9}")
+            continue
+        slow, slow_time = timed(legacy_days_worked, data)
+        pd.testing.assert_frame_equal(slow, fast, check_dtype=False)
+        print(f"{rows:>8} {slow_time:>12.3f} {fast_time:>15.4f} "
+              f"{slow_time / fast_time:>8.0f}x")
+
+
+def bench_loader(args):
+    print(f"{'rows':>8} {'2x read_excel (s)':>18} {'one pass (s)':>13} "
+          f"{'saved (s)':>10}  one-pass breakdown")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f'input_{rows}.xlsx')
+            write_workbook(path, rows)
+
+            twice = once = float('inf')
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                pd.read_excel(path, sheet_name='Sheet1')
+                pd.read_excel(path, sheet_name='Sheet2')
+                twice = min(twice, time.perf_counter() - started)
+
+                loaded, seconds = timed(read_input_workbook, path)
+                if seconds < once:
+                    sheets, once = loaded, seconds
+            breakdown = ", ".join(f"{phase} {seconds:.3f}"
+                                  for phase, seconds in sheets['timings'].items())
+            print(f"{rows:>8} {twice:>18.3f} {once:>13.3f} "
+                  f"{twice - once:>10.3f}  {breakdown}")
+
+
+def bench_writer(args):
+    print(f"{'employees':>10} {'months':>7} {'legacy (s)':>11} "
+          f"{'bulk (s)':>9} {'speedup':>8}")
+    for employees in args.employees:
+        r1, r2 = make_report_frames(employees, args.months)
+        _, slow_time = timed(legacy_write_report, r1, r2, io.BytesIO())
+        _, fast_time = timed(write_revenue_report, r1, r2, io.BytesIO())
+        print(f"{employees:>10} {args.months:>7} {slow_time:>11.3f} "
+              f"{fast_time:>9.3f} {slow_time / fast_time:>7.1f}x")
+
+
+def bench_assembly(args):
+    from revenue_core.pipeline import (_month_table, _operating_cost_table,
+                                       process_data)
+
+    grouped_df = process_data({'Sheet1': make_allocations(args.rows)})
+    months = MONTHS[:args.months]
+
+    _, old_time = timed(legacy_month_assembly, grouped_df, months)
+    _, new_time = timed(_month_table, grouped_df, months)
+    print(f"Monthly_MIS assembly ({len(grouped_df)} employees, "
+          f"{len(months)} months): {old_time:.3f}s -> {new_time:.3f}s")
+
+    final_df = make_expenses()
+    final_df['Month_sal'] = 500000
+    final_df['Total_Expenses'] = final_df.sum(axis=1)
+    for month in months:
+        final_df[month] = grouped_df[month].sum()
+    _, old_time = timed(legacy_operating_cost_assembly, final_df, months)
+    _, new_time = timed(_operating_cost_table, final_df, months)
+    print(f"Operating_Cost assembly ({len(months)} months): "
+          f"{old_time:.4f}s -> {new_time:.4f}s")
+
+
+def bench_aggregation(args):
+    agg = {
+        'Name': 'unique',
+        'Project': 'unique',
+        'PO_No': 'unique',
+        'Month_sal': 'unique',
+        'Monthly_revenue': 'sum',
+        'Proj_start': 'unique',
+        'Proj_end': 'unique',
+        **{month: 'sum' for month in MONTHS}
+    }
+    print(f"{'rows':>8} {'employees':>10} {'groupby (s)':>12} {'peak MB':>8} "
+          f"{'kernel (s)':>11} {'peak MB':>8} {'speedup':>8}")
+    for rows in args.rows:
+        result = make_revenue_rows(rows)
+        old, old_time, old_peak = traced(legacy_aggregate, result, agg)
+        new, new_time, new_peak = traced(aggregate_by_employee, result, agg)
+#       groupby sums with Kahan compensation, reduceat does not: the sums
+#       may differ in the last bit
+        pd.testing.assert_frame_equal(old, new, rtol=1e-12)
+        print(f"{rows:>8} {len(new):>10} {old_time:>12.3f} "
+              f"{old_peak / 2 ** 20:>8.1f} {new_time:>11.3f} "
+              f"{new_peak / 2 ** 20:>8.1f} {old_time / new_time:>7.1f}x")
+
+
+def bench_export(args):
+    r1, r2 = make_report_frames(args.employees, args.months, transpose=False)
+    print(f"{args.employees} employees, {args.months} months")
+    print(f"{'format':>8} {'seconds':>8} {'KB':>9}")
+    for name, report_format in REPORT_FORMATS.items():
+        target = io.BytesIO()
+        try:
+            _, seconds = timed(report_format.write, r1, r2, target)
+        except ImportError as e:
+            print(f"{name:>8} {'n/a':>8} {'-':>9}  ({e.__class__.__name__})")
+            continue
+        print(f"{name:>8} {seconds:>8.3f} {len(target.getvalue()) / 1024:>9.0f}")
+
+
+def bench_streaming(args):
+    from revenue_core import process_data
+
+    print(f"{args.employees} employees")
+    print(f"{'rows':>8} {'chunk':>7} {'loaded (s)':>11} {'peak MB':>8} "
+          f"{'streamed (s)':>13} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f'input_{rows}.xlsx')
+            write_workbook(path, rows, args.employees)
+
+            loaded, old_time, old_peak = traced(
+                lambda: process_data(read_input_workbook(path),
+                                     chunk_size=args.chunk_size))
+            streamed, new_time, new_peak = traced(
+                process_data, path, None, None, args.chunk_size)
+            pd.testing.assert_frame_equal(loaded, streamed, check_exact=True)
+            print(f"{rows:>8} {args.chunk_size:>7} {old_time:>11.3f} "
+                  f"{old_peak / 2 ** 20:>8.1f} {new_time:>13.3f} "
+                  f"{new_peak / 2 ** 20:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='bench', required=True)
+
+    month_overlap = subparsers.add_parser(
+        'month_overlap', help='day-by-day loop vs. month-overlap kernel')
+    month_overlap.add_argument('--rows', type=int, nargs='+',
+                               default=[1000, 10000, 100000])
+    month_overlap.add_argument(
+        '--legacy-limit', type=int, default=10000,
+        help='skip the legacy loop above this many rows')
+    month_overlap.set_defaults(func=bench_month_overlap)
+
+    loader = subparsers.add_parser(
+        'loader', help='two read_excel calls vs. one workbook pass')
+    loader.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    loader.add_argument('--repeat', type=int, default=3,
+                        help='keep the best of this many runs')
+    loader.set_defaults(func=bench_loader)
+
+    writer = subparsers.add_parser(
+        'writer', help='per-cell formatting loop vs. bulk report writer')
+    writer.add_argument('--employees', type=int, nargs='+',
+                        default=[1000, 5000])
+    writer.add_argument('--months', type=int, default=3)
+    writer.set_defaults(func=bench_writer)
+
+    assembly = subparsers.add_parser(
+        'assembly', help='month table assembly regression check and timing')
+    assembly.add_argument('--rows', type=int, default=30000)
+    assembly.add_argument('--months', type=int, default=12)
+    assembly.set_defaults(func=bench_assembly)
+
+    aggregation = subparsers.add_parser(
+        'aggregation', help="groupby 'unique' vs. columnar employee kernel")
+    aggregation.add_argument('--rows', type=int, nargs='+',
+                             default=[10000, 100000])
+    aggregation.set_defaults(func=bench_aggregation)
+
+    export = subparsers.add_parser(
+        'export', help='report size and write time of every output format')
+    export.add_argument('--employees', type=int, default=50000)
+    export.add_argument('--months', type=int, default=12)
+    export.set_defaults(func=bench_export)
+
+    streaming = subparsers.add_parser(
+        'streaming', help='loaded vs. streamed Sheet1, same chunk size')
+    streaming.add_argument('--rows', type=int, nargs='+',
+                           default=[20000, 60000])
+    streaming.add_argument('--employees', type=int, default=2000)
+    streaming.add_argument('--chunk-size', type=int, default=5000)
+    streaming.set_defaults(func=bench_streaming)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
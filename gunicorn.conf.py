@@ -0,0 +1,73 @@
+"""
+gunicorn settings for wsgi:app, overridable from the environment:
+
+    WEB_BIND              address to listen on (default 0.0.0.0:8000)
+    WEB_CONCURRENCY       worker processes (default: one per CPU)
+    WEB_THREADS           threads per worker (default 4)
+    WEB_MAX_REQUESTS      requests a worker serves before it is recycled
+                          (default 500, 0 never recycles); job status
+                          polls do not count, and a worker with jobs
+                          queued or running waits for them
+    WEB_TIMEOUT           seconds a request may take (default 300)
+"""
+import multiprocessing
+import os
+import threading
+
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('WEB_BIND', '0.0.0.0:8000')
+
+# Workers are forked from a master that has already imported the app,
+# pandas, numpy and xlsxwriter (see wsgi.py)
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Recycle a worker after N requests to bound the memory pandas holds on
+# to; the jitter keeps the workers from restarting all at once. The
+# recycling is held off while the worker has background jobs (pre_request)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 500))
+max_requests_jitter = max_requests // 10
+
+# Large workbooks take a while to process and write
+timeout = int(os.environ.get('WEB_TIMEOUT', 300))
+graceful_timeout = timeout
+
+
+def post_fork(server, worker):
+#   Every worker re-queues the jobs whose lease ran out (a previous run, a
+#   killed worker); a job is claimed by one worker only
+    import main11
+    from wsgi import app
+    main11.start_job_queue(app)
+    main11.start_report_pool(app)
+
+
+# Guards the worker's max_requests against the request threads
+recycle_lock = threading.Lock()
+
+
+def pre_request(worker, req):
+#   Runs before the worker counts the request towards max_requests. A
+#   status poll every 2s would otherwise recycle a worker mid-job, and the
+#   arbiter kills a worker that has not exited timeout seconds later. Only
+#   the limit is raised; the request count stays gunicorn's
+    import main11
+    from wsgi import app
+    with recycle_lock:
+        if req.method == 'GET' and req.path.startswith('/jobs/') and \
+                not req.path.endswith('/result'):
+            worker.max_requests += 1
+        if main11.report_services(app).job_queue.pending():
+            worker.max_requests = max(worker.max_requests, worker.nr + 2)
+
+
+def worker_exit(server, worker):
+#   Hand the jobs of a stopping worker to the others: queued ones are
+#   dropped and the leases of all of them released, so the next heartbeat
+#   of another worker re-queues them instead of waiting for the lease
+    import main11
+    from wsgi import app
+    main11.report_services(app).job_queue.shutdown(wait=False)
@@ -0,0 +1,411 @@
+import concurrent.futures
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+
+logger = logging.getLogger('logger')
+
+# Job states, in order
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+# Fields of a job returned by JobQueue.status
+STATUS_FIELDS = ('job_id', 'status', 'error', 'error_status', 'created',
+                 'updated', 'download_name')
+
+
+class JobFailed(Exception):
+    """
+    Raised by a job runner for an expected failure, e.g. an invalid upload.
+
+    Attributes:
+        message (str): Error shown to the client.
+        status (int): HTTP status the result endpoint answers with.
+    """
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class MemoryJobStore:
+    """
+    Job records kept in a dict; lost when the process exits.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id, payload, owner, lease_until):
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id, 'status': QUEUED, 'payload': payload,
+                'error': None, 'error_status': None, 'created': now,
+                'updated': now, 'download_name': None, 'mimetype': None,
+                'result': None, 'owner': owner, 'lease_until': lease_until}
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields, updated=time.time())
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def start(self, job_id, owner, lease_until):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['owner'] != owner or job['status'] != QUEUED:
+                return False
+            job.update(status=RUNNING, lease_until=lease_until,
+                       updated=time.time())
+            return True
+
+    def finish(self, job_id, owner, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['owner'] != owner:
+                return False
+            job.update(fields, updated=time.time())
+            return True
+
+    def renew(self, owner, lease_until):
+        with self._lock:
+            for job in self._jobs.values():
+                if job['owner'] == owner and \
+                        job['status'] in (QUEUED, RUNNING):
+                    job['lease_until'] = lease_until
+
+    def claim_expired(self, owner, now, lease_until):
+        with self._lock:
+            expired = sorted(
+                (job for job in self._jobs.values()
+                 if job['status'] in (QUEUED, RUNNING)
+                 and job['lease_until'] < now),
+                key=lambda job: job['created'])
+            for job in expired:
+                job.update(status=QUEUED, owner=owner,
+                           lease_until=lease_until)
+            return [job['job_id'] for job in expired]
+
+    def release(self, owner):
+        with self._lock:
+            for job in self._jobs.values():
+                if job['owner'] == owner and \
+                        job['status'] in (QUEUED, RUNNING):
+                    job['lease_until'] = 0
+
+    def purge(self, finished_before):
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job['status'] in (DONE, FAILED)
+                           and job['updated'] < finished_before]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    """
+    Job records, payloads and results in a local SQLite file.
+
+    Several processes can share the file. Every queued or running job is
+    leased by the JobQueue that runs it (owner, lease_until); a job whose
+    lease ran out, e.g. because its process was killed or restarted, is
+    claimed again by whichever queue checks first (JobQueue.recover).
+    """
+
+    COLUMNS = ('job_id', 'status', 'payload', 'error', 'error_status',
+               'created', 'updated', 'download_name', 'mimetype', 'result',
+               'owner', 'lease_until')
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file, created if missing.
+        """
+        self._connection = sqlite3.connect(path, check_same_thread=False,
+                                           timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT, payload BLOB, "
+                "error TEXT, error_status INTEGER, created REAL, updated REAL, "
+                "download_name TEXT, mimetype TEXT, result BLOB, "
+                "owner TEXT, lease_until REAL)")
+#           Files written before jobs were leased lack the lease columns
+            existing = {row[1] for row in self._connection.execute(
+                "PRAGMA table_info(jobs)")}
+            for column, kind in (('owner', 'TEXT'), ('lease_until', 'REAL')):
+                if column not in existing:
+                    self._connection.execute(
+                        f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _execute(self, sql, parameters=()):
+        with self._lock, self._connection:
+            return self._connection.execute(sql, parameters).rowcount
+
+    def create(self, job_id, payload, owner, lease_until):
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (job_id, status, payload, created, updated, "
+            "owner, lease_until) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, pickle.dumps(payload), now, now, owner,
+             lease_until))
+
+    def _assign(self, fields):
+        fields['updated'] = time.time()
+        if 'payload' in fields:
+            fields['payload'] = pickle.dumps(fields['payload'])
+        return ', '.join(f"{name} = ?" for name in fields), \
+            tuple(fields.values())
+
+    def update(self, job_id, **fields):
+        assignments, values = self._assign(fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                      (*values, job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?",
+                (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        if job['payload'] is not None:
+            job['payload'] = pickle.loads(job['payload'])
+        return job
+
+    def start(self, job_id, owner, lease_until):
+        return self._execute(
+            "UPDATE jobs SET status = ?, lease_until = ?, updated = ? "
+            "WHERE job_id = ? AND owner = ? AND status = ?",
+            (RUNNING, lease_until, time.time(), job_id, owner, QUEUED)) == 1
+
+    def finish(self, job_id, owner, **fields):
+        assignments, values = self._assign(fields)
+        return self._execute(
+            f"UPDATE jobs SET {assignments} WHERE job_id = ? AND owner = ?",
+            (*values, job_id, owner)) == 1
+
+    def renew(self, owner, lease_until):
+        self._execute(
+            "UPDATE jobs SET lease_until = ? "
+            "WHERE owner = ? AND status IN (?, ?)",
+            (lease_until, owner, QUEUED, RUNNING))
+
+    def claim_expired(self, owner, now, lease_until):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) "
+                "AND (lease_until IS NULL OR lease_until < ?) "
+                "ORDER BY created", (QUEUED, RUNNING, now)).fetchall()
+        claimed = []
+        for job_id, in rows:
+#           Another process may claim the same job in between; only the
+#           update that still sees the expired lease wins
+            if self._execute(
+                    "UPDATE jobs SET status = ?, owner = ?, lease_until = ? "
+                    "WHERE job_id = ? AND status IN (?, ?) "
+                    "AND (lease_until IS NULL OR lease_until < ?)",
+                    (QUEUED, owner, lease_until, job_id, QUEUED, RUNNING,
+                     now)) == 1:
+                claimed.append(job_id)
+        return claimed
+
+    def release(self, owner):
+        self._execute(
+            "UPDATE jobs SET lease_until = 0 "
+            "WHERE owner = ? AND status IN (?, ?)",
+            (owner, QUEUED, RUNNING))
+
+    def purge(self, finished_before):
+        self._execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?",
+            (DONE, FAILED, finished_before))
+
+
+class JobQueue:
+    """
+    Run report jobs on a background thread pool.
+
+    submit() stores the payload and returns a job ID at once; a worker
+    calls runner(payload), which returns (data, download_name, mimetype)
+    or raises JobFailed. Finished jobs are kept for result_ttl seconds.
+
+    The queue leases its queued and running jobs for lease seconds and
+    renews the leases from a heartbeat thread; the same thread re-queues
+    the jobs of any queue sharing the store whose lease ran out, so a
+    killed process does not leave its jobs running forever.
+    """
+
+    def __init__(self, runner, store=None, workers=2, result_ttl=3600,
+                 lease=60):
+        """
+        Args:
+            runner (callable): payload -> (bytes, download name, mimetype).
+            store (MemoryJobStore | SQLiteJobStore, optional): Job records;
+            in memory by default.
+            workers (int): Worker threads.
+            result_ttl (int): Seconds finished jobs are kept.
+            lease (int): Seconds a job stays claimed without a heartbeat.
+        """
+        self.runner = runner
+        self.store = store if store is not None else MemoryJobStore()
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self.owner = uuid.uuid4().hex
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='report-job')
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat = None
+
+    def _start_heartbeat(self):
+#       Started on first use, so a queue built before a fork owns no thread
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(
+                    target=self._beat, name='report-job-lease', daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stopped.wait(self.lease / 3):
+            try:
+                self.store.renew(self.owner, time.time() + self.lease)
+                self.recover()
+            except Exception:
+                logger.exception("Job lease heartbeat failed")
+
+    def _enqueue(self, job_id):
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(self._run, job_id)
+
+    def submit(self, payload):
+        """
+        Queue a job.
+
+        Args:
+            payload: Picklable job input passed to the runner.
+
+        Returns:
+            str: The job ID.
+        """
+        self._start_heartbeat()
+        self.store.purge(time.time() - self.result_ttl)
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, payload, self.owner,
+                          time.time() + self.lease)
+        self._enqueue(job_id)
+        logger.info(f"Job {job_id} queued")
+        return job_id
+
+    def recover(self):
+        """
+        Re-queue the queued or running jobs whose lease ran out, e.g. those
+        of a killed or restarted process, and start the heartbeat.
+
+        Returns:
+            int: Number of jobs re-queued.
+        """
+        self._start_heartbeat()
+        if self._stopped.is_set():
+            return 0
+        job_ids = self.store.claim_expired(self.owner, time.time(),
+                                           time.time() + self.lease)
+        for job_id in job_ids:
+            logger.info(f"Job {job_id} re-queued after its lease ran out")
+            self._enqueue(job_id)
+        return len(job_ids)
+
+    def pending(self):
+        """
+        Jobs queued or running in this process.
+        """
+        with self._lock:
+            return self._pending
+
+    def _run(self, job_id):
+        try:
+            self._run_job(job_id)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _finish(self, job_id, **fields):
+        if not self.store.finish(job_id, self.owner, **fields):
+            logger.warning(f"Job {job_id} was taken over, result dropped")
+            return False
+        return True
+
+    def _run_job(self, job_id):
+        job = self.store.get(job_id)
+        if job is None or not self.store.start(
+                job_id, self.owner, time.time() + self.lease):
+            return
+        started = time.perf_counter()
+        try:
+            data, download_name, mimetype = self.runner(job['payload'])
+        except JobFailed as e:
+            if self._finish(job_id, status=FAILED, payload=None,
+                            error=e.message, error_status=e.status):
+                logger.error(f"Job {job_id} failed: {e.message}")
+            return
+        except Exception as e:
+            if self._finish(job_id, status=FAILED, payload=None,
+                            error=str(e), error_status=500):
+                logger.exception(f"Job {job_id} crashed")
+            return
+        if self._finish(job_id, status=DONE, payload=None, result=data,
+                        download_name=download_name, mimetype=mimetype):
+            logger.info(f"Job {job_id} done in {time.perf_counter() - started:.2f}s")
+
+    def status(self, job_id):
+        """
+        Public state of a job.
+
+        Args:
+            job_id (str): Job ID from submit.
+
+        Returns:
+            dict: STATUS_FIELDS of the job, or None for an unknown job.
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        return {field: job[field] for field in STATUS_FIELDS}
+
+    def result(self, job_id):
+        """
+        Finished report of a job.
+
+        Args:
+            job_id (str): Job ID from submit.
+
+        Returns:
+            dict: The full job record (status, error, result bytes,
+            download_name, mimetype), or None for an unknown job.
+        """
+        return self.store.get(job_id)
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting jobs.
+
+        With wait, finish the queued and running jobs first. Otherwise the
+        queued jobs are dropped and the leases of all of them released, so
+        another queue sharing the store picks them up at its next heartbeat.
+        """
+        self._stopped.set()
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        if not wait:
+            self.store.release(self.owner)
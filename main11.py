@@ -1,11 +1,24 @@
+import functools
+import io
 import os
 import shutil
-from flask import Flask, render_template, request, send_file, make_response
-import pandas as pd
-import numpy as np
+import tempfile
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from flask import (Blueprint, Flask, Request, current_app, jsonify,
+                   render_template, request, send_file, make_response,
+                   url_for)
 import logging
 import warnings
 
+from job_queue import DONE, FAILED, JobFailed, JobQueue, SQLiteJobStore
+from revenue_core import (PNL_TABLES, REPORT_FORMATS, PoolBusy, ReportPool,
+                          ResultCache, entity_report_task, init_task_cache,
+                          pnl_task, read_batch_archive, report_task,
+                          run_batch, set_task_cache, task_cache_stats,
+                          write_batch_archive)
+from revenue_core.pool import PRELOAD_MODULES
+
 
 logger = logging.getLogger('logger')
 logger.setLevel(logging.DEBUG)
@@ -19,552 +32,552 @@ logger.addHandler(handler)
 
 warnings.filterwarnings("ignore")
 
+# Parent of the per-request upload workspaces
+UPLOAD_ROOT = os.path.join(os.path.expanduser('~'), 'Desktop', 'flask_uploads')
+
 
-def process_data(input_data_path):
+class UploadRequest(Request):
+    """
+    Request that spools uploaded files into memory instead of a temporary
+    file when IN_MEMORY_UPLOADS is enabled.
     """
-    Process the input data from an Excel file 
-    and calculate revenue of employee.
 
-    Args:
-        input_data_path (str): The path to the input Excel file.
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        if current_app.config['IN_MEMORY_UPLOADS']:
+            return io.BytesIO()
+        return super()._get_file_stream(total_content_length, content_type,
+                                        filename, content_length)
+
+
+DEFAULT_CONFIG = {
+#   Keep uploads and reports in memory; set to False to go through a
+#   per-request workspace on disk instead
+    'IN_MEMORY_UPLOADS': True,
+#   Background report jobs: worker threads, and an optional SQLite file that
+#   keeps queued jobs and results across restarts (None keeps them in memory)
+    'JOB_WORKERS': 2,
+    'JOB_DATABASE': None,
+#   Seconds a job stays claimed by a process that stopped renewing it; after
+#   that any process sharing JOB_DATABASE re-queues it
+    'JOB_LEASE': 60,
+#   Memory cap of the parsed-upload cache, 0 disables it
+    'RESULT_CACHE_MAX_BYTES': 256 * 1024 * 1024,
+#   Reports, /api/pnl tables and /batch entities are computed in this many
+#   worker processes (0 runs them on the request or job thread); past
+#   REPORT_QUEUE_DEPTH tasks queued or running, /process and /api/pnl answer
+#   503 at once, and jobs wait for a free slot
+    'REPORT_PROCESSES': 2,
+    'REPORT_QUEUE_DEPTH': 8,
+}
+
+
+class ReportServices:
+    """
+    Background workers of one app, kept in app.extensions['reports'].
 
-    Returns:
-        pd.DataFrame(grouped_df): A DataFrame containing processed data.
+    Attributes:
+        job_queue (JobQueue): Queued /jobs and /batch uploads.
+        report_pool (ReportPool): Processes computing the reports, or None
+        to compute them on the request thread.
+    """
 
-    Raises:
-        pd.errors.EmptyDataError: If the input Excel file is empty.
-        pd.errors.ParserError: 
-        If the input Excel file contains invalid content.
-        Exception: If an unexpected error occurs during processing.
+    def __init__(self, job_queue, report_pool=None):
+        self.job_queue = job_queue
+        self.report_pool = report_pool
+
+
+def report_services(app=None):
     """
+    The ReportServices of app, by default of the app handling the request.
+    """
+    return (app or current_app).extensions['reports']
 
-    try:
-        #       Define the input data list
-        input_data = []
-
-        data = pd.read_excel(input_data_path, sheet_name='Sheet1')
-        logger.info("File reading done (Sheet1)")
-
-#       Iterate through rows in the DataFrame and append to input_data
-        for index, row in data.iterrows():
-            project_data = {
-                "Proj_start": row["Proj_start"],
-                "Proj_end": row["Proj_end"],
-            }
-            input_data.append(project_data)
-#       Initialize a dictionary to store the days worked in each month
-        months = [
-            "January", "February", "March", "April", "May", "June", "July",
-            "August", "September", "October", "November", "December"
-        ]
-        days_worked = {month: [] for month in months}
-
-#       Add column names
-        # column_names = months
-
-#       Loop through the input data and calculate days worked for each month
-        for entry in input_data:
-            start_date = entry["Proj_start"]
-            end_date = entry["Proj_end"]
-
-#           Initialize a list to store days worked for this entry
-            entry_days_worked = [0] * len(months)
-
-#           Calculate days worked for each month
-            while start_date <= end_date:
-                entry_days_worked[start_date.month - 1] += 1
-                start_date += pd.DateOffset(days=1)
-
-#           Append the entry's days worked to the respective month
-            for i, month in enumerate(months):
-                days_worked[month].append(entry_days_worked[i])
-
-#       Create a DataFrame
-        df = pd.DataFrame(days_worked)
-
-        Month_df = df[[
-            'January', 'February', 'March', 'April', 'May', 'June', 'July',
-            'August', 'September', 'October', 'November', 'December'
-        ]] / [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-        Month_df = np.ceil(Month_df * 100) / 100
-        Month_df.insert(0, 'Emp_ID', data['Emp_ID'])
-        Month_df.insert(1, 'Project', data['Project'])
-        x = (data['Proj_end'] - data['Proj_start']).dt.days
-        data["proj_Timeline"] = x / 30
-
-#       Create boolean masks for Rate_per_day, Rate_per_month, and Rate_PO
-        mask_day = data['Rate_per_day'] > 0
-        mask_month = data['Rate_per_month'] > 0
-        mask_po = data['Rate_PO'] > 0
-
-#       Use np.where to conditionally calculate Monthly_revenue
-        data['Monthly_revenue'] = pd.Series(
-            np.where(
-                mask_day, data['Rate_per_day'] * 21,
-                np.where(
-                    mask_month, data['Rate_per_month'],
-                    np.where(mask_po, data['Rate_PO'] / data['proj_Timeline'],
-                             0))))
-
-        b = data[[
-            "Emp_ID", "Name", "Month_sal", "Project", "PO_No",
-            "Monthly_revenue", "Proj_start", "Proj_end"
-        ]]
-
-        result = pd.merge(Month_df, b, on=['Emp_ID', 'Project'])
-        result = result.iloc[:, [
-            0, 14, 15, 1, 16, 17, 18, 19, 2, 3, 4,
-            5, 6, 7, 8, 9, 10, 11, 12, 13
-        ]]
-
-        result[[
-            'January', 'February', 'March', 'April', 'May', 'June', 'July',
-            'August', 'September', 'October', 'November', 'December'
-        ]] = result[[
-            'January', 'February', 'March', 'April', 'May', 'June', 'July',
-            'August', 'September', 'October', 'November', 'December'
-        ]].multiply(result['Monthly_revenue'], axis=0)
-
-#       Group data by month and aggregate project-related information into list
-        grouped_df = result.groupby(['Emp_ID']).agg({
-            'Name': 'unique',
-            'Project': 'unique',
-            'PO_No': 'unique',
-            'Month_sal': 'unique',
-            'Monthly_revenue': 'sum',
-            'Proj_start': 'unique',
-            'Proj_end': 'unique',
-            'January': 'sum',
-            'February': 'sum',
-            'March': 'sum',
-            'April': 'sum',
-            'May': 'sum',
-            'June': 'sum',
-            'July': 'sum',
-            'August': 'sum',
-            'September': 'sum',
-            'October': 'sum',
-            'November': 'sum',
-            'December': 'sum'
-        })
-
-        grouped_df = grouped_df.reset_index()
-#       Return the processed data or any relevant results
-        return grouped_df
-    except pd.errors.EmptyDataError:
-        error_message = "Error: The input Excel file is empty."
+
+# UI Part
+bp = Blueprint('reports', __name__)
+
+
+@bp.route('/')
+def index():
+    logger.info("Accessed the index route")
+    return render_template('index.html')
+
+
+# Counters summed over the report pool workers by /cache/stats
+CACHE_COUNTERS = ('hits', 'misses', 'evictions', 'entries', 'bytes',
+                  'max_bytes')
+
+
+@bp.route('/cache/stats')
+def cache_stats():
+    """
+    Parsed-upload cache counters.
+
+    With a report pool every worker process has its own cache, so the
+    counters are summed over the workers as each last reported them with a
+    task, and listed per worker process ID under "workers".
+    """
+    report_pool = report_services().report_pool
+    if report_pool is None:
+        return jsonify(task_cache_stats())
+    workers = report_pool.worker_reports()
+    stats = {counter: sum(worker[counter] for worker in workers.values())
+             for counter in CACHE_COUNTERS}
+    stats['workers'] = {str(pid): worker for pid, worker in workers.items()}
+    return jsonify(stats)
+
+
+@bp.route('/process', methods=['POST'])
+def process_upload():
+    logger.info("Received POST request to process data")
+    if 'file' not in request.files:
+        error_message = "No file Selected"
         logger.error(error_message)
         # return render_template('error.html', error_message=error_message)
-        response = make_response("Error: The input Excel file is empty.", 400)
+        response = make_response("No file selected. Please select a file", 404)
         return response
 
-    except pd.errors.ParserError:
-        error_message = "Error: The input Excel file contains invalid content, Please select valid input file"
+    file = request.files['file']
+#   Optional expenses table (Sheet2) for CSV / Parquet allocation exports
+    expenses = request.files.get('expenses')
+
+#   Check if the file has a filename
+    if file.filename == '':
+        error_message = "No Selected Files"
         logger.error(error_message)
         # return render_template('error.html', error_message=error_message)
-        response = make_response(
-            "Error: The input Excel file contains invalid content, Please select valid input file", 400)
+        response = make_response("No file selected. Please select a file", 404)
         return response
-    except Exception:
-        error_message = "Error: The input Excel file contains invalid content, Please select valid input file"
-        logger.error(error_message)
-        # return render_template('error.html', error_message=error_message)
+
+#   Report backend: the formatted xlsx, or csv / parquet / arrow tables
+    output_format = request.form.get('output_format') or 'xlsx'
+    if output_format not in REPORT_FORMATS:
         response = make_response(
-            "Error: The input Excel file contains invalid content, Please select valid input file", 400)
+            f"Unsupported output format, choose one of {', '.join(REPORT_FORMATS)}", 400)
         return response
+    report_format = REPORT_FORMATS[output_format]
 
+    temp_dir = None
+    try:
+        if current_app.config['IN_MEMORY_UPLOADS']:
+#           Parse the upload straight from memory and build the report
+#           into a buffer, no temporary files involved
+            upload = (file.filename, file.read())
+            result_file_path = None
+        else:
+#           Give every request its own workspace under UPLOAD_ROOT, so
+#           concurrent uploads never overwrite or delete each other's files
+            os.makedirs(UPLOAD_ROOT, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix='request_', dir=UPLOAD_ROOT)
+            logger.info(f"Create temporary directory {temp_dir}")
+
+#           Save the uploaded file to the temporary directory; the report
+#           task reads it and writes the report next to it
+            file_path = os.path.join(
+                temp_dir, 'temp_file' + os.path.splitext(file.filename)[1])
+            file.save(file_path)
+            upload = (file.filename, file_path)
+            result_file_path = os.path.join(
+                temp_dir, report_format.download_name)
 
-# 2nd function used for fetch revenue of selected month and their profit_loss
-def get_employee_data_by_months(grouped_df, selected_months, input_data_path):
+        try:
+#           Compute and write the report in a worker process, or inline
+#           without a report pool
+            status, body = _run_task(
+                report_services().report_pool, report_task, upload,
+                (expenses.filename, expenses.read()) if expenses else None,
+                request.form.to_dict(), output_format, result_file_path)
+        except PoolBusy as e:
+            return _busy_response(e)
+        except Exception as e:
+            logger.exception("Report worker failed")
+            return _worker_failure_response(e)
+        if status != 200:
+            return make_response(body.decode(), status)
+        logger.info(f"Report written to {report_format.download_name}")
+
+#       Send the processed data file as a response
+        return send_file(
+            io.BytesIO(body) if result_file_path is None else result_file_path,
+            as_attachment=True, download_name=report_format.download_name,
+            mimetype=report_format.mimetype)
+    finally:
+        #       Clean up: Remove this request's directory and its contents
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True,)
+            logger.info("Removed temporary directory")
+
+
+@bp.route('/api/pnl', methods=['POST'])
+def api_pnl():
+    """
+    P&L tables of an upload as JSON (or Arrow IPC), without the workbook.
+
+    Form fields as for /process, plus:
+        format: "json" (default) or "arrow" (one table per response).
+        tables: Comma separated subset of PNL_TABLES (default both; the
+        first one for Arrow).
+        columns: Comma separated columns to return (default all).
+        offset, limit: Page of employee rows (default all rows); the
+        operating-cost table is never paged.
+    An empty month selection returns every month.
     """
-    Extract employee data by specified months and calculate revenue with 
-    Profit_Loss.
+    logger.info("Received POST request to /api/pnl")
+    file = request.files.get('file')
+    if not file:
+        return make_response(jsonify(error="No file selected"), 400)
+    expenses = request.files.get('expenses')
+
+    output_format = request.form.get('format', 'json')
+    table_names = [name for name in request.form.get(
+        'tables', ','.join(PNL_TABLES)).replace(" ", "").split(",") if name]
+    columns = [col.strip() for col in request.form.get(
+        'columns', '').split(",") if col.strip()]
+    try:
+        offset = max(int(request.form.get('offset') or 0), 0)
+        limit = request.form.get('limit')
+        limit = None if limit in (None, '') else max(int(limit), 0)
+    except ValueError:
+        return make_response(jsonify(error="offset and limit must be integers"), 400)
+    if output_format not in ('json', 'arrow') or not table_names or \
+            any(name not in PNL_TABLES for name in table_names):
+        return make_response(jsonify(
+            error=f"format must be json or arrow, tables a subset of {', '.join(PNL_TABLES)}"), 400)
+
+    try:
+        status, body, mimetype, headers = _run_task(
+            report_services().report_pool, pnl_task,
+            (file.filename, file.read()),
+            (expenses.filename, expenses.read()) if expenses else None,
+            request.form.to_dict(), table_names, columns, offset, limit,
+            output_format)
+    except PoolBusy as e:
+        return _busy_response(e, as_json=True)
+    except Exception as e:
+        logger.exception("P&L API request failed")
+        return _worker_failure_response(e, as_json=True)
+    response = make_response(body, status)
+    response.mimetype = mimetype
+    response.headers.update(headers)
+    return response
+
+
+def _run_task(report_pool, task, *args, block=False):
+    """
+    Run a revenue_core task in report_pool, or inline when it is None.
+
+    Raises:
+        PoolBusy: If block is False and the pool queue is full.
+    """
+    if report_pool is None:
+        return task(*args)
+    return report_pool.run(task, *args, block=block)
+
+
+def _busy_response(error, as_json=False):
+    """
+    503 for an upload the report pool has no room for.
 
     Args:
-        grouped_df (pd.DataFrame): 
-        DataFrame containing grouped and processed data.
-        selected_months (list): 
-        List of selected months for data extraction,Profit_Loss Calculations.
-        input_data_path (str): The path to the input Excel file.
+        error (PoolBusy): The rejection.
+        as_json (bool): Answer with a JSON error document (/api/pnl).
 
     Returns:
-        pd.DataFrame:DataFrames containing employee revenue with Profit_Loss by 
-        selected months and overall profit/loss data.
+        flask.Response: The error, with a Retry-After header.
     """
+    logger.error(f"Rejected upload: {error}")
+    return _unavailable_response(
+        "The server is busy processing other reports, please try again shortly",
+        as_json)
 
-    while True:
-        months = selected_months
 
-#       Check if all specified month columns exist in the DataFrame
-        if all(month in grouped_df.columns for month in months):
-            break           # Break the loop if all months are valid
-        else:
-            invalid_months = [
-                month for month in months if month not in grouped_df.columns]
-            logger.error(
-                f"The following columns do not exist in the DataFrame: {', '.join(invalid_months)}. Please try again.")
-            break
-
-#   Initialize an empty list to store DataFrames for each month
-    dataframes = []
-    try:
-        for i in months:
-            columns_to_fetch = ['Emp_ID', 'Name', 'Month_sal',
-                                'Project', 'PO_No', 'Proj_start', 'Proj_end'] + [i]
-            employee_data_month = grouped_df[columns_to_fetch]
-
-            employee_data_month[f"P_L_{i}"] = employee_data_month[i] - \
-                employee_data_month['Month_sal']
-            employee_data_month[f"P_L_{i}_%"] = employee_data_month.apply(lambda row:
-                                                                          ((row[i] - row['Month_sal']) / row[i] * 100)
-                                                                          if row[i] > 0 else 0, axis=1)
-
-            employee_data_month = employee_data_month.round(2)
-
-#           Check if the DataFrame is empty or has no valid data
-            if employee_data_month.empty or not any(
-                    employee_data_month[column].notna().any() for column in employee_data_month.columns):
-                print(f"DataFrame for {i} is empty or has no valid data.")
-                continue        # Skip empty DataFrames
-
-#           Append the DataFrame for this month to the list
-            dataframes.append(employee_data_month)
-
-#       Concatenate all DataFrames into a single DataFrame, removing duplicate columns
-        result_df = pd.concat(dataframes, axis=1).loc[:, ~pd.concat(
-            dataframes, axis=1).columns.duplicated()]
-    except Exception as e:
-        error_message = "Column in input Excel file (Sheet1) is not valid, Please check column name as standard"
-        logger.error(error_message)
-        # return render_template('error.html', error_message=error_message)
-        response = make_response(
-            "Column in input Excel file (Sheet1) is not valid, Please check column name as standard", 400)
-        return response
+def _worker_failure_response(error, as_json=False):
+    """
+    Response for a report task that failed outside the report pipeline.
 
-    for col in result_df.columns:
-        #       Use str.replace to remove square brackets for string values
-        result_df[col] = result_df[col].apply(lambda x: str(
-            x).replace('[', '').replace(']', '').replace("'", ""))
+    The tasks turn upload errors into their own status, so anything raised
+    here is a server fault, e.g. a pool worker that crashed or was killed
+    for memory. ReportPool replaces a broken pool, so that upload is worth
+    retrying.
 
-    for col in result_df.columns[0:5]:
-        try:
-            result_df[col] = pd.to_numeric(
-                result_df[col], errors='coerce').astype(int)
-        except ValueError:
-            pass
+    Args:
+        error (Exception): Raised by _run_task.
+        as_json (bool): Answer with a JSON error document (/api/pnl).
 
-    for col in result_df.columns[7:]:
-        try:
-            result_df[col] = pd.to_numeric(
-                result_df[col], errors='coerce').astype(float).round(2)
-        except ValueError:
-            pass
-
-    result_df['PO_No'] = result_df['PO_No'].replace('nan', 'NA')
-    result_df[['Proj_start', 'Proj_end']] = result_df[[
-        'Proj_start', 'Proj_end']].replace('NaT', 'NA')
-    result_df['Proj_start'] = result_df['Proj_start'].apply(
-        lambda input_string: ', '.join(date.split('T')[0] for date in input_string.split()))
-    result_df['Proj_end'] = result_df['Proj_end'].apply(
-        lambda input_string: ', '.join(date.split('T')[0] for date in input_string.split()))
-
-#   2nd Requirement - Overall Profit Loss
-    sheet2 = pd.read_excel(input_data_path, sheet_name='Sheet2')
-    logger.info("File reading done (Sheet2)")
-    a = result_df['Month_sal'].sum()
-    sheet2['Month_sal'] = a
-    sheet2['Total_Expenses'] = sheet2.iloc[:, 0:8].sum(axis=1)
-
-    months1 = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
-               'August', 'September', 'October', 'November', 'December']
-
-    filtered_columns = [col for col in result_df.columns if col in months1]
-
-#   Create a new DataFrame with only the desired columns
-    new_df = result_df[filtered_columns]
-    new_df = new_df.sum()
-    a = pd.DataFrame(new_df).T
-    final_df = pd.concat([sheet2, a], axis=1)
-
-    dataframe = []
-    try:
-        for i in a.columns:
-            #           Include Rent, Professional Fees, Other Operating Cost, Stipend Expenses, Asstes(Laptop, Headphone etc), Annual Meet Expense, Taxes(Advance & SA Tax), Month_sal, Total_Expenses and the specified month columns
-            columns_fetch = ['Rent', 'Professional Fees', 'Other Operating Cost', 'Stipend Expenses',
-                             'Asstes (Laptop, Headphone etc)', 'Annual Meet Expense', 'Taxes (Advance & SA Tax)', 'Month_sal', 'Total_Expenses'] + [i]
-            overall = final_df[columns_fetch]
+    Returns:
+        flask.Response: 503 with Retry-After for a broken pool, else 500.
+    """
+    if isinstance(error, BrokenProcessPool):
+        return _unavailable_response(
+            "The report worker stopped unexpectedly, please try again shortly",
+            as_json)
+    message = "The server failed to build the report, please try again later"
+    return make_response(jsonify(error=message) if as_json else message, 500)
 
-            overall[f"P_L_{i}"] = (overall[i] - overall['Total_Expenses'])
 
-            dataframe.append(overall)
+def _unavailable_response(message, as_json=False):
+    """
+    503 asking the client to retry the upload in a few seconds.
 
-#           Concatenate all DataFrames into a single DataFrame, removing duplicate columns
-            result_df1 = pd.concat(dataframe, axis=1).loc[:, ~pd.concat(
-                dataframe, axis=1).columns.duplicated()]
-            result_df1.T.reset_index()
+    Returns:
+        flask.Response: The message, with a Retry-After header.
+    """
+    response = make_response(
+        jsonify(error=message) if as_json else message, 503)
+    response.headers['Retry-After'] = '10'
+    return response
 
-        return result_df, result_df1
-    except Exception as e:
-        error_message = "Column in input Excel file (Sheet2) is not valid, Please check column name as standard"
-        logger.error(error_message)
-        # return render_template('error.html', error_message=error_message)
-        response = make_response(
-            "Column in input Excel file (Sheet2) is not valid, Please check column name as standard.", 404)
-        return response
 
+def _run_report_job(app, payload):
+    """
+    Build the report of a queued /jobs upload on a worker thread.
 
-# UI Part
-app = Flask(
-    __name__, static_folder=r"C:\Users\Admin\OneDrive - bizmetric.com\Desktop\New_demo\templates")
+    Args:
+        app (Flask): The app the job was queued on.
+        payload (dict): "file" and "expenses" as (filename, bytes) or None,
+        and the request "form" fields.
 
+    Returns:
+        tuple: (report bytes, download name, mimetype).
 
-@app.route('/')
-def index():
-    logger.info("Accessed the index route")
-    return render_template('index.html')
+    Raises:
+        JobFailed: With the error message and status /process would send.
+    """
+    form = payload['form']
+    output_format = form.get('output_format') or 'xlsx'
+#   Jobs are queued already, so they wait for a free pool slot
+    try:
+        if 'entities' in payload:
+            return _run_batch_job(app, payload['entities'], form,
+                                  output_format)
+        status, body = _run_task(report_services(app).report_pool,
+                                 report_task, payload['file'],
+                                 payload['expenses'], form, output_format,
+                                 block=True)
+    except BrokenProcessPool as e:
+        raise JobFailed("The report worker stopped unexpectedly, please submit the job again", 503) from e
+    if status != 200:
+        raise JobFailed(body.decode(), status)
+    report_format = REPORT_FORMATS[output_format]
+    return body, report_format.download_name, report_format.mimetype
+
+
+def _run_batch_job(app, entities, form, output_format):
+    """
+    Build the reports of a /batch zip, one entity per report pool task.
 
+    Args:
+        app (Flask): The app the batch was queued on.
+        entities (list): (filename, bytes) of every entity workbook.
+        form (dict): Request form fields, shared by every entity.
+        output_format (str): Key of REPORT_FORMATS.
 
-@app.route('/process', methods=['POST'])
-def process_upload():
-    logger.info("Received POST request to process data")
-    if 'file' not in request.files:
-        error_message = "No file Selected"
-        logger.error(error_message)
-        # return render_template('error.html', error_message=error_message)
+    Returns:
+        tuple: (zip bytes, download name, mimetype).
+    """
+    report_pool = report_services(app).report_pool
+    if report_pool is None:
+        results = [entity_report_task(entity, None, form, output_format)
+                   for entity in entities]
+    else:
+        results = run_batch(entity_report_task, entities, None, form,
+                            output_format, pool=report_pool)
+    target = io.BytesIO()
+    write_batch_archive([filename for filename, _ in entities], results,
+                        output_format, target)
+    return target.getvalue(), 'revenue_batch.zip', 'application/zip'
+
+
+def start_job_queue(app):
+    """
+    (Re)build the background job queue of app from its config.
+
+    Called once per process: a pre-forking server calls it in every worker
+    after the fork, so no SQLite connection or thread crosses a fork. Every
+    queue sharing JOB_DATABASE re-queues the jobs whose lease ran out, e.g.
+    those of a previous run or of a killed worker.
+
+    Returns:
+        JobQueue: The new queue.
+    """
+    database = app.config['JOB_DATABASE']
+    job_queue = JobQueue(
+        functools.partial(_run_report_job, app),
+        SQLiteJobStore(database) if database else None,
+        workers=app.config['JOB_WORKERS'], lease=app.config['JOB_LEASE'])
+    report_services(app).job_queue = job_queue
+    recovered = job_queue.recover()
+    if recovered:
+        logger.info(f"Re-queued {recovered} unfinished jobs")
+    return job_queue
+
+
+def start_report_pool(app):
+    """
+    (Re)build the report process pool of app from its config and start its
+    workers, each with revenue_core and pandas already imported.
+
+    Like start_job_queue, called once per process after any fork.
+
+    Returns:
+        ReportPool: The new pool, or None when REPORT_PROCESSES is 0.
+    """
+    services = report_services(app)
+    if services.report_pool is not None:
+        services.report_pool.shutdown(wait=False)
+    services.report_pool = None
+    if app.config['REPORT_PROCESSES']:
+        services.report_pool = ReportPool(
+            app.config['REPORT_PROCESSES'], app.config['REPORT_QUEUE_DEPTH'],
+            preload=PRELOAD_MODULES + ('revenue_core.pipeline',
+                                       'revenue_core.pnl'),
+            setup=init_task_cache,
+            setup_args=(app.config['RESULT_CACHE_MAX_BYTES'],),
+            report=task_cache_stats)
+        services.report_pool.warm()
+    return services.report_pool
+
+
+@bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue an upload for background processing, same form as /process.
+
+    Returns 202 with the job ID and the URLs to poll and download.
+    """
+    logger.info("Received POST request to queue a job")
+    file = request.files.get('file')
+    if not file:
         response = make_response("No file selected. Please select a file", 404)
         return response
+    output_format = request.form.get('output_format') or 'xlsx'
+    if output_format not in REPORT_FORMATS:
+        response = make_response(
+            f"Unsupported output format, choose one of {', '.join(REPORT_FORMATS)}", 400)
+        return response
 
-    file = request.files['file']
+    expenses = request.files.get('expenses')
+    job_id = report_services().job_queue.submit({
+        'file': (file.filename, file.read()),
+        'expenses': (expenses.filename, expenses.read()) if expenses else None,
+        'form': request.form.to_dict(),
+    })
+    return make_response(jsonify(
+        job_id=job_id, status='queued',
+        status_url=url_for('.job_status', job_id=job_id),
+        result_url=url_for('.job_result', job_id=job_id)), 202)
 
-#   Check if the file has a filename
-    if file.filename == '':
-        error_message = "No Selected Files"
-        logger.error(error_message)
-        # return render_template('error.html', error_message=error_message)
+
+@bp.route('/batch', methods=['POST'])
+def submit_batch():
+    """
+    Queue a zip of entity workbooks (one per business unit) as one job.
+
+    Form fields as for /process, applied to every entity. The job result is
+    a zip with each entity's report, a consolidated Operating_Cost roll-up
+    and a Batch_Summary.csv listing the entities that failed.
+    Returns 202 with the job ID and the URLs to poll and download.
+    """
+    logger.info("Received POST request to queue a batch")
+    file = request.files.get('file')
+    if not file:
         response = make_response("No file selected. Please select a file", 404)
         return response
+    output_format = request.form.get('output_format') or 'xlsx'
+    if output_format not in REPORT_FORMATS:
+        response = make_response(
+            f"Unsupported output format, choose one of {', '.join(REPORT_FORMATS)}", 400)
+        return response
+    try:
+        entities = read_batch_archive(file.stream)
+    except zipfile.BadZipFile:
+        response = make_response("Please upload the entity workbooks as a zip file", 400)
+        return response
+    if not entities:
+        response = make_response("The zip file holds no workbooks", 400)
+        return response
 
-#   Specify the path to the "flask_uploads" folder on your desktop
-    temp_dir = os.path.join(os.path.expanduser('~'),
-                            'Desktop', 'flask_uploads')
+    job_id = report_services().job_queue.submit({
+        'entities': entities,
+        'form': request.form.to_dict(),
+    })
+    logger.info(f"Batch {job_id}: {len(entities)} entities")
+    return make_response(jsonify(
+        job_id=job_id, status='queued',
+        status_url=url_for('.job_status', job_id=job_id),
+        result_url=url_for('.job_result', job_id=job_id)), 202)
 
-    try:
-        #Ensure the temporary directory exists, or create it
-        os.makedirs(temp_dir, exist_ok=True)
-        logger.info("Create temporary directory")
 
-#       Save the uploaded file to the temporary directory
-        file_path = os.path.join(temp_dir, 'temp_file.xlsx')
-        file.save(file_path)
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    status = report_services().job_queue.status(job_id)
+    if status is None:
+        return make_response(jsonify(error="Unknown job"), 404)
+    return jsonify(status)
 
-        try:
 
-            #Process the uploaded file using the process_data function
-            grouped_df = process_data(file_path)
-            logger.info("Calling function : process_data")
-#           Get the selected months from the form
-            selected_months = request.form.get(
-                "months").replace(" ", "").split(",")
-            logger.info(f"Months Selected :{selected_months}")
-
-
-#           Call the get_employee_data_by_months function with selected months as input
-            r1, r2 = get_employee_data_by_months(
-                grouped_df, selected_months, file_path)
-            logger.info("Calling function : get_employee_data_by_months")
-
-            # transpose
-            r2 = r2.T.reset_index()
-
-#           Define the result file path
-            result_file_path = os.path.join(temp_dir, 'revenue.xlsx')
-
-#           Create a Pandas Excel writer using XlsxWriter as the engine
-            writer = pd.ExcelWriter(result_file_path, engine='xlsxwriter')
-
-#           Convert the DataFrame to an XlsxWriter Excel object
-            r1.to_excel(writer, index=False, sheet_name='Monthly_MIS')
-            r2.to_excel(writer, startcol=0, index=False,
-                        header=False, sheet_name='Operating_Cost')
-
-#           Get the xlsxwriter workbook and worksheet objects
-            workbook = writer.book
-            worksheet = writer.sheets['Monthly_MIS']
-            worksheet2 = writer.sheets['Operating_Cost']
-
-            # Merge two cells and set the merged cell's value
-            # worksheet2.merge_range('A1:B1', 'Operating Cost', workbook.add_format({'align': 'center', 'valign': 'vcenter'}))
-            # worksheet2.add_format
-
-#           Define formats for cell coloring
-            navy_blue_format = workbook.add_format(
-                {'bg_color': '#0070C0', 'border': 1})
-            green_format = workbook.add_format(
-                {'bg_color': '#09991E', 'border': 1})
-            purple_format = workbook.add_format(
-                {'bg_color': '#8064A2', 'border': 1})
-            orange_format = workbook.add_format(
-                {'bg_color': '#FF9900', 'border': 1})
-            pink_format = workbook.add_format(
-                {'bg_color': '#FF8080', 'border': 1})
-            light_blue_format = workbook.add_format(
-                {'bg_color': '#DCE6F1', 'border': 1})
-            light_green_format = workbook.add_format(
-                {'bg_color': '#C4D79B', 'border': 1})
-            light_purple_format = workbook.add_format(
-                {'bg_color': '#E4DFEC', 'border': 1})
-            light_orange_format = workbook.add_format(
-                {'bg_color': '#FFFF99', 'border': 1})
-            light_pink_format = workbook.add_format(
-                {'bg_color': '#FFFFCC', 'border': 1})
-            # red_format = workbook.add_format(
-            #     {'bg_color': '#FF4D28', 'border': 1})
-
-            # -ve values
-            ng_green = workbook.add_format(
-                {'bg_color': '#97B953', 'border': 1})
-            ng_purple = workbook.add_format(
-                {'bg_color': '#B1A0C7', 'border': 1})
-            ng_orange = workbook.add_format(
-                {'bg_color': '#FFCC66', 'border': 1})
-            ng_pink = workbook.add_format({'bg_color': '#FCD5B4', 'border': 1})
-
-#           Determine the number of rows and columns in the DataFrame
-            num_rows, num_cols = r1.shape
-
-            for col_num in range(num_cols):
-                if col_num < 7:
-                    cell_value = r1.columns[col_num]
-                    format_to_apply = navy_blue_format
-                elif col_num in [7, 8, 9, 19, 20, 21, 31, 32, 33]:
-                    cell_value = r1.columns[col_num]
-                    format_to_apply = green_format
-                elif col_num in [10, 11, 12, 22, 23, 24, 34, 35, 36]:
-                    cell_value = r1.columns[col_num]
-                    format_to_apply = purple_format
-                elif col_num in [13, 14, 15, 25, 26, 27, 37, 38, 39]:
-                    cell_value = r1.columns[col_num]
-                    format_to_apply = orange_format
-                elif col_num in [16, 17, 18, 28, 29, 30, 40, 41, 42]:
-                    cell_value = r1.columns[col_num]
-                    format_to_apply = pink_format
-                worksheet.write(0, col_num, cell_value, format_to_apply)
-
-#           Apply formatting to the cells based on your criteria
-            for col_num in range(num_cols):
-                # Start from row 1 to skip the header
-                for row_num in range(1, num_rows + 1):
-                    numeric_value = pd.to_numeric(cell_value, errors='coerce')
-                    cell_value = r1.iloc[row_num - 1, col_num]
-
-                    if col_num < 7:  # First 6 columns in light grey
-                        format_to_apply = light_blue_format
-                    elif col_num in [7, 8, 9, 19, 20, 21, 31, 32, 33]:
-                        if pd.notna(cell_value) and pd.to_numeric(cell_value, errors='coerce') < 0:
-                            format_to_apply = ng_green
-                        else:
-                            format_to_apply = light_green_format
-                    elif col_num in [10, 11, 12, 22, 23, 24, 34, 35, 36]:
-                        if pd.notna(cell_value) and pd.to_numeric(cell_value, errors='coerce') < 0:
-                            format_to_apply = ng_purple
-                        else:
-                            format_to_apply = light_purple_format
-                    elif col_num in [13, 14, 15, 25, 26, 27, 37, 38, 39]:
-                        if pd.notna(cell_value) and pd.to_numeric(cell_value, errors='coerce') < 0:
-                            format_to_apply = ng_orange
-                        else:
-                            format_to_apply = light_orange_format
-                    elif col_num in [16, 17, 18, 28, 29, 30, 40, 41, 42]:
-                        if pd.notna(cell_value) and pd.to_numeric(cell_value, errors='coerce') < 0:
-                            format_to_apply = ng_pink
-                        else:
-                            format_to_apply = light_pink_format
-                    else:
-                        format_to_apply = None
-
-                    # if pd.notna(cell_value):
-                    #     numeric_value = pd.to_numeric(cell_value, errors='coerce')
-                    #     if not pd.isna(numeric_value) and numeric_value < 0:
-                    #         format_to_apply = red_format
-                    if format_to_apply:
-                        #                       Apply both color and borders
-                        worksheet.write(row_num, col_num,
-                                        cell_value, format_to_apply)
-
-            # colour code for sheet2
-            # worksheet2 = writer.sheets['Operating_Cost']
-            # Merge two cells and set the merged cell's value
-            cell_format = workbook.add_format(
-                {'bg_color': '#3366FF', 'align': 'center', 'valign': 'vcenter', 'border': 1})
-            worksheet2.merge_range('A1:B1', 'Operating Cost', cell_format)
-            # worksheet2.merge_range('A1:B1', 'Operating Cost', workbook.add_format({'align': 'center', 'valign': 'vcenter'}))
-
-            # Determine the number of rows and columns in the DataFrame
-            num_rows2, num_cols2 = r2.shape
-            # Apply formatting to the cells based on your criteria
-            for col_num in range(num_cols2):
-                # Start from row 1 to skip the header
-                for row_num in range(1, num_rows2 + 1):
-                    cell_value2 = r2.iloc[row_num - 1, col_num]
-                    if col_num == 0:
-                        if row_num <= 9:
-                            format_to_apply = light_blue_format
-                        elif row_num in [10, 11, 18, 19, 26, 27]:
-                            format_to_apply = light_green_format
-                        elif row_num in [12, 13, 20, 21, 28, 29]:
-                            format_to_apply = light_purple_format
-                        elif row_num in [14, 15, 22, 23, 30, 31]:
-                            format_to_apply = light_orange_format
-                        elif row_num in [16, 17, 24, 25, 32, 33]:
-                            format_to_apply = light_pink_format
-                    elif col_num == 1:
-                        if row_num <= 9:
-                            format_to_apply = light_blue_format
-                        # elif row_num == 9:
-                        #     format_to_apply = navy_blue_format
-                        elif row_num in [10, 11, 18, 19, 26, 27]:
-                            format_to_apply = light_green_format
-                        elif row_num in [12, 13, 20, 21, 28, 29]:
-                            format_to_apply = light_purple_format
-                        elif row_num in [14, 15, 22, 23, 30, 31]:
-                            format_to_apply = light_orange_format
-                        elif row_num in [16, 17, 24, 25, 32, 33]:
-                            format_to_apply = light_pink_format
-                    else:
-                        format_to_apply = None
-                    if format_to_apply:
-                        # Apply both color and borders
-                        worksheet2.write(row_num, col_num,
-                                         cell_value2, format_to_apply)
-
-
-#           Save the Excel file
-            writer.save()
-            writer.close()
-            logger.info("Saved and Closed Excel file")
-
-#           Send the processed data file as a response
-            return send_file(result_file_path, as_attachment=True)
-        except pd.errors.ParserError:
-            error_message = "Error: The uploaded file is not a valid Excel file."
-            # return render_template('error.html', error_message=error_message)
-            response = make_response(
-                "Error: The uploaded file is not a valid Excel file.", 404)
-            return response
-        except Exception:
-            error_message = "Make sure you have provided a vaild input FILE and selected the MONTHS"
-#           Render the error template with the error message
-            # return render_template('error.html', error_message=error_message)
-            response = make_response(
-                "Make sure you have provided a vaild input FILE and selected the MONTHS", 404)
-            return response
-    finally:
-        #       Clean up: Remove the temporary directory and its contents
-        shutil.rmtree(temp_dir, ignore_errors=True,)
-        logger.info("Removed temporary directory")
+@bp.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """
+    Download a finished job's report; a failed job answers with the error
+    /process would have sent, an unfinished one with 409 and its status.
+    """
+    job_queue = report_services().job_queue
+    job = job_queue.result(job_id)
+    if job is None:
+        return make_response(jsonify(error="Unknown job"), 404)
+    if job['status'] == FAILED:
+        return make_response(job['error'], job['error_status'])
+    if job['status'] != DONE:
+        return make_response(jsonify(job_queue.status(job_id)), 409)
+    return send_file(io.BytesIO(job['result']), as_attachment=True,
+                     download_name=job['download_name'],
+                     mimetype=job['mimetype'])
+
+
+def create_app(config=None, start_workers=True):
+    """
+    Build an app serving the report routes.
+
+    Settings are taken, in increasing priority, from DEFAULT_CONFIG,
+    FLASK_<NAME> environment variables (e.g. FLASK_JOB_WORKERS=4,
+    FLASK_JOB_DATABASE=jobs.db) and config. Each app has its own job queue
+    and report pool; reports computed on the request thread share the
+    parsed-upload cache of the process, as a report pool worker has one.
+
+    Args:
+        config (dict, optional): app.config overrides.
+        start_workers (bool): Start the job queue and report pool now; a
+        pre-forking server passes False and calls start_job_queue and
+        start_report_pool in each worker instead.
+
+    Returns:
+        Flask: The new app.
+    """
+    app = Flask(
+        __name__, static_folder=r"C:\Users\Admin\OneDrive - bizmetric.com\Desktop\New_demo\templates")
+    app.request_class = UploadRequest
+    app.config.update(DEFAULT_CONFIG)
+    app.config.from_prefixed_env()
+    app.config.update(config or {})
+    app.register_blueprint(bp)
+
+    set_task_cache(ResultCache(app.config['RESULT_CACHE_MAX_BYTES']))
+#   Until start_job_queue, jobs are kept in memory and reports run inline;
+#   the queue starts no thread before its first job
+    app.extensions['reports'] = ReportServices(JobQueue(
+        functools.partial(_run_report_job, app),
+        workers=app.config['JOB_WORKERS'], lease=app.config['JOB_LEASE']))
+    if start_workers:
+        start_job_queue(app)
+        start_report_pool(app)
+    return app
 
 
 if __name__ == '__main__':
+#   Development server only, FLASK_DEBUG=1 turns on the reloader and
+#   debugger; serve production traffic through wsgi.py
     logging.info("Starting flask API")
-    app.run(debug=True)
+    create_app().run()
     logging.info("Stopped flask API")
@@ -0,0 +1,121 @@
+"""
+Build revenue reports from the command line, without the web app.
+
+Usage:
+    python -m revenue_cli Input/Input_demo_review.xlsx --months January,February
+    python -m revenue_cli allocations.csv --expenses expenses.csv --output-format csv
+    python -m revenue_cli Input/ --months March --output month_end.zip
+
+One data file gives one report. Several files or a directory give a batch
+zip: a report per entity, the consolidated Operating_Cost roll-up and a
+Batch_Summary.csv. Exits with status 1 if any report failed.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from revenue_core import (MONTHS, REPORT_FORMATS, describe_error,
+                          entity_report_task, read_batch_directory,
+                          report_tables, run_batch, table_format,
+                          write_batch_archive)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m revenue_cli',
+        description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='+',
+                        help='data file(s), or a folder with one per entity')
+    parser.add_argument('--months', default='',
+                        help='comma separated months, e.g. January,February '
+                             '(default: all)')
+    parser.add_argument('--period-start', default=None,
+                        help='first month of a reporting window, e.g. 2024-01')
+    parser.add_argument('--period-end', default=None,
+                        help='last month of the reporting window')
+    parser.add_argument('--expenses', default=None,
+                        help='Sheet2 expenses file for a CSV / Parquet input')
+    parser.add_argument('--output-format', default='xlsx',
+                        choices=list(REPORT_FORMATS))
+    parser.add_argument('-o', '--output', default=None,
+                        help='report path (default: the download name of '
+                             'the format, revenue_batch.zip for a batch)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='batch worker processes (default: one per CPU)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='log the pipeline steps to stderr')
+    return parser, parser.parse_args(argv)
+
+
+def run_single(args, months):
+    """
+    Write the report of one data file.
+
+    Returns:
+        int: Exit status.
+    """
+    path = args.inputs[0]
+    output = args.output or REPORT_FORMATS[args.output_format].download_name
+    try:
+        r1, r2 = report_tables(
+            path, table_format(path), months, args.period_start,
+            args.period_end, args.expenses,
+            table_format(args.expenses) if args.expenses else None)
+        REPORT_FORMATS[args.output_format].write(r1, r2, output)
+    except Exception as e:
+        message, _ = describe_error(e)
+        print(f"{path}: {message}", file=sys.stderr)
+        return 1
+    print(f"Saved {output}")
+    return 0
+
+
+def run_entities(args, months):
+    """
+    Write the batch zip of several data files or directories.
+
+    Returns:
+        int: Exit status.
+    """
+    entities = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            entities.extend(read_batch_directory(path))
+        else:
+            with open(path, 'rb') as f:
+                entities.append((os.path.basename(path), f.read()))
+    if not entities:
+        print(f"No input files in {', '.join(args.inputs)}", file=sys.stderr)
+        return 1
+
+    form = {'months': months, 'period_start': args.period_start,
+            'period_end': args.period_end}
+    results = run_batch(entity_report_task, entities, None, form,
+                        args.output_format, workers=args.workers)
+    output = args.output or 'revenue_batch.zip'
+    summary = write_batch_archive([name for name, _ in entities], results,
+                                  args.output_format, output)
+    print(summary.to_string(index=False))
+    print(f"Saved {output}")
+    return 0 if (summary['Status'] == 200).all() else 1
+
+
+def main(argv=None):
+    parser, args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.CRITICAL,
+        format='%(asctime)s - %(levelname)s - %(message)s')
+
+#   No month selected reports every month (of the window)
+    months = args.months or ','.join(MONTHS)
+    batch = len(args.inputs) > 1 or os.path.isdir(args.inputs[0])
+    if batch and args.expenses:
+        parser.error('--expenses applies to a single data file')
+    if batch:
+        return run_entities(args, months)
+    return run_single(args, months)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Revenue and P&L reporting core, usable without the web app.
+
+    from revenue_core import ReportError, report_tables
+
+    try:
+        r1, r2 = report_tables('Input/Input_demo_review.xlsx', 'excel',
+                               'January,February')
+    except ReportError as e:
+        print(e.message)
+
+Failures raise the ReportError subclasses of revenue_core.errors; main11
+turns them into HTTP responses and revenue_cli into an exit status.
+"""
+from .batch import (read_batch_archive, read_batch_directory, run_batch,
+                    write_batch_archive)
+from .cache import ResultCache
+from .engine import MONTHS
+from .errors import (EmptyInputError, InvalidColumnsError, InvalidInputError,
+                     InvalidWindowError, MissingSheetError, ReportError,
+                     UnknownMonthError)
+from .loader import table_format
+from .pipeline import (describe_error, entity_report_task,
+                       get_employee_data_by_months, get_full_year_tables,
+                       init_task_cache, load_upload, month_columns,
+                       process_data, report_task, report_tables,
+                       select_months, selected_months, set_task_cache,
+                       task_cache_stats)
+from .pnl import PNL_TABLES, pnl_task
+from .pool import PoolBusy, ReportPool
+from .writer import REPORT_FORMATS
+
+__all__ = [
+    'MONTHS', 'PNL_TABLES', 'REPORT_FORMATS', 'EmptyInputError',
+    'InvalidColumnsError', 'InvalidInputError', 'InvalidWindowError',
+    'MissingSheetError',
+    'PoolBusy', 'ReportError', 'ReportPool', 'ResultCache',
+    'UnknownMonthError', 'describe_error', 'entity_report_task',
+    'get_employee_data_by_months', 'get_full_year_tables', 'init_task_cache',
+    'load_upload', 'month_columns', 'pnl_task', 'process_data',
+    'read_batch_archive', 'read_batch_directory', 'report_tables',
+    'report_task', 'run_batch', 'select_months', 'selected_months',
+    'set_task_cache', 'table_format', 'task_cache_stats',
+    'write_batch_archive',
+]
@@ -0,0 +1,236 @@
+"""
+Batch mode: one report per entity workbook plus a consolidated
+Operating_Cost roll-up, with the entities processed in parallel.
+
+Run from the command line with
+    python -m revenue_cli Input/ --months January,February --output batch.zip
+"""
+import collections
+import concurrent.futures
+import io
+import logging
+import multiprocessing
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from .pool import PRELOAD_MODULES, warm_worker
+from .writer import REPORT_FORMATS, wire_frame
+
+
+logger = logging.getLogger('logger')
+
+# Input files picked up from a batch zip or directory
+# (openpyxl reads no legacy .xls workbooks)
+BATCH_EXTENSIONS = ('.xlsx', '.xlsm', '.csv', '.parquet', '.pq')
+
+ROLLUP_NAME = 'Consolidated_Operating_Cost'
+SUMMARY_NAME = 'Batch_Summary.csv'
+
+
+def _batch_member(name):
+    """
+    Whether a file name is a batch input, skipping folders, hidden files and
+    Excel lock files (~$...).
+    """
+    base = os.path.basename(name)
+    return bool(base) and not base.startswith(('.', '~$')) and \
+        '__MACOSX' not in name and base.lower().endswith(BATCH_EXTENSIONS)
+
+
+def read_batch_archive(stream):
+    """
+    Read the entity workbooks out of an uploaded zip.
+
+    Args:
+        stream (file-like): The zip archive.
+
+    Returns:
+        list: (member path, bytes) of every input file, sorted by path; the
+        folders of the path name the entity (see entity_names).
+
+    Raises:
+        zipfile.BadZipFile: If the upload is not a zip archive.
+    """
+    with zipfile.ZipFile(stream) as archive:
+        return [(name, archive.read(name))
+                for name in sorted(archive.namelist())
+                if _batch_member(name)]
+
+
+def read_batch_directory(path):
+    """
+    Read the entity workbooks of a directory (not recursive).
+
+    Args:
+        path (str): Directory holding one workbook per entity.
+
+    Returns:
+        list: (filename, bytes) of every input file, sorted by name.
+    """
+    entities = []
+    for name in sorted(os.listdir(path)):
+        file_path = os.path.join(path, name)
+        if os.path.isfile(file_path) and _batch_member(name):
+            with open(file_path, 'rb') as f:
+                entities.append((name, f.read()))
+    return entities
+
+
+def entity_names(filenames):
+    """
+    Entity name of every input file, suffixed with _2, _3 ... when two
+    files share it.
+
+    A file in a folder, e.g. "BU1/report.xlsx" of a zip, is named after its
+    folder, or after folder and file when the folder holds several inputs;
+    a folder holding every file is skipped. Other files are named after the
+    file name without extension.
+
+    Args:
+        filenames (list): Input file names or zip member paths.
+
+    Returns:
+        list: One unique name per file.
+    """
+    paths = [filename.replace('\\', '/').strip('/').split('/')
+             for filename in filenames]
+    while len(paths) > 1 and all(len(path) > 1 for path in paths) and \
+            len({path[0] for path in paths}) == 1:
+        paths = [path[1:] for path in paths]
+    folder_files = collections.Counter(tuple(path[:-1]) for path in paths)
+
+    names, seen = [], {}
+    for path in paths:
+        name = os.path.splitext(path[-1])[0]
+        if len(path) > 1:
+            folder = '_'.join(path[:-1])
+            name = folder if folder_files[tuple(path[:-1])] == 1 else \
+                f"{folder}_{name}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return names
+
+
+def run_batch(task, entities, *args, workers=None, pool=None):
+    """
+    Run task((filename, bytes), *args) for every entity across processes.
+
+    The processes are started for the batch and sized to the CPU count by
+    default, so wall-clock time grows with files / cores rather than with
+    the number of files. A server passes its shared ReportPool instead, so
+    batches never start processes beyond it.
+
+    Args:
+        task (callable): Module level task function.
+        entities (list): (filename, bytes) of every entity.
+        *args: Further picklable task arguments.
+        workers (int, optional): Worker processes.
+        pool (ReportPool, optional): Run the entities in this pool, as many
+        at a time as it has workers, waiting for free slots.
+
+    Returns:
+        list: The task results, in the order of entities.
+
+    Raises:
+        BrokenProcessPool: If a worker process died.
+    """
+    if pool is not None:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(min(pool.workers, len(entities)), 1),
+                thread_name_prefix='batch-entity') as threads:
+            return list(threads.map(
+                lambda entity: pool.run(task, entity, *args, block=True),
+                entities))
+    workers = min(workers or os.cpu_count() or 1, max(len(entities), 1))
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=warm_worker,
+            initargs=(PRELOAD_MODULES + (task.__module__,),)) as executor:
+        futures = [executor.submit(task, entity, *args) for entity in entities]
+        return [future.result() for future in futures]
+
+
+def consolidate_operating_cost(tables):
+    """
+    Roll the Operating_Cost tables of several entities up into one.
+
+    Args:
+        tables (dict): Entity name -> its one-row Operating_Cost table.
+
+    Returns:
+        pd.DataFrame: One row per entity, labelled in an "Entity" column,
+        followed by a "Total" row; every expense, month and P&L column is a
+        plain sum, so the total P&L is total revenue - total expenses.
+    """
+    rollup = pd.concat(
+        [table.assign(Entity=name) for name, table in tables.items()],
+        ignore_index=True)
+    rollup = rollup[['Entity'] + [col for col in rollup.columns
+                                  if col != 'Entity']]
+    numeric = rollup.select_dtypes(include=np.number).columns
+    total = rollup[numeric].sum().to_frame().T.assign(Entity='Total')
+    return pd.concat([rollup, total], ignore_index=True)
+
+
+def _table_bytes(frame, output_format):
+    """
+    Serialize one table in a report output format.
+
+    Args:
+        frame (pd.DataFrame): The table.
+        output_format (str): Key of REPORT_FORMATS.
+
+    Returns:
+        tuple: (file extension, bytes).
+    """
+    buffer = io.BytesIO()
+    if output_format == 'xlsx':
+        frame.to_excel(buffer, sheet_name='Operating_Cost', index=False,
+                       engine='xlsxwriter')
+    elif output_format == 'csv':
+        frame.to_csv(buffer, index=False)
+    elif output_format == 'parquet':
+        wire_frame(frame).to_parquet(buffer, index=False)
+    else:
+        wire_frame(frame).to_feather(buffer)
+    return output_format, buffer.getvalue()
+
+
+def write_batch_archive(filenames, results, output_format, target):
+    """
+    Write the per-entity reports, the roll-up and a summary into a zip.
+
+    Args:
+        filenames (list): Input file name of every entity.
+        results (list): (status, report bytes or error message bytes,
+        Operating_Cost table or None) of every entity.
+        output_format (str): Key of REPORT_FORMATS.
+        target (str | io.BytesIO): Output path or buffer.
+
+    Returns:
+        pd.DataFrame: The summary: entity, file, status and error message.
+    """
+    download_name = REPORT_FORMATS[output_format].download_name
+    summary, tables = [], {}
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, filename, (status, body, operating_cost) in zip(
+                entity_names(filenames), filenames, results):
+            if status == 200:
+                archive.writestr(f"{name}/{download_name}", body)
+                tables[name] = operating_cost
+            summary.append({'Entity': name, 'File': filename,
+                            'Status': status,
+                            'Error': '' if status == 200 else body.decode()})
+        if tables:
+            extension, data = _table_bytes(
+                consolidate_operating_cost(tables), output_format)
+            archive.writestr(f"{ROLLUP_NAME}.{extension}", data)
+        summary = pd.DataFrame(summary,
+                               columns=['Entity', 'File', 'Status', 'Error'])
+        archive.writestr(SUMMARY_NAME, summary.to_csv(index=False))
+    logger.info(f"Batch archive: {len(tables)} of {len(results)} entities reported")
+    return summary
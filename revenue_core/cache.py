@@ -0,0 +1,139 @@
+import collections
+import hashlib
+import logging
+import os
+import threading
+
+import pandas as pd
+
+
+logger = logging.getLogger('logger')
+
+# Bytes hashed per read when fingerprinting an upload
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def content_digest(stream):
+    """
+    SHA-256 of a file's contents, leaving a file-like object rewound.
+
+    Args:
+        stream (str | file-like): File path, or seekable upload stream.
+
+    Returns:
+        str: Hex digest of the bytes.
+    """
+    if isinstance(stream, (str, os.PathLike)):
+        with open(stream, 'rb') as f:
+            return content_digest(f)
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _frame_bytes(value):
+    """
+    Approximate memory held by the DataFrames inside a cached value.
+
+    Args:
+        value: DataFrame, or a tuple / list / dict nesting them.
+
+    Returns:
+        int: Bytes, counting object columns deeply.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        return sum(_frame_bytes(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(_frame_bytes(item) for item in value)
+    return 0
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of parsed uploads, capped by memory.
+
+    Entries are evicted least recently used first once the DataFrames they
+    hold exceed max_bytes together; a single entry larger than the cap is
+    not stored. Cached values are shared between requests and must be
+    treated as read-only.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Memory cap; 0 disables the cache.
+        """
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Look up a key and mark it as most recently used.
+
+        Args:
+            key (tuple): Cache key.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Store a value, evicting least recently used entries over the cap.
+
+        Args:
+            key (tuple): Cache key.
+            value: DataFrames (or containers of them) to keep.
+        """
+        size = _frame_bytes(value)
+        if size > self.max_bytes:
+            logger.info(f"Result cache: entry of {size} bytes exceeds the cap")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry, keeping the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Hit / miss counters and current usage.
+
+        Returns:
+            dict: hits, misses, evictions, entries, bytes and max_bytes.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self._bytes,
+                    'max_bytes': self.max_bytes}
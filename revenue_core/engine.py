@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June", "July",
+    "August", "September", "October", "November", "December"
+]
+
+
+def _to_days(values):
+    """
+    Convert a date column to a datetime64[D] array (NaT preserved).
+
+    Args:
+        values (pd.Series | array-like): Project start or end dates.
+
+    Returns:
+        np.ndarray: Dates truncated to day resolution.
+    """
+    return pd.to_datetime(values).to_numpy().astype('datetime64[D]')
+
+
+def month_overlap_days(proj_start, proj_end):
+    """
+    Count the days every project row spends in each calendar month.
+
+    Every row's [Proj_start, Proj_end] interval (both ends inclusive) is
+    expanded into the months it spans and clipped to the month boundaries
+    with datetime64 arithmetic. Each row only expands its own months, so the
+    cost is O(total months spanned) instead of one Timestamp per day, and a
+    single long interval does not pad every other row.
+
+    Args:
+        proj_start (pd.Series | array-like): Project start dates.
+        proj_end (pd.Series | array-like): Project end dates.
+
+    Returns:
+        tuple: Three flat int64 arrays with one entry per (row, spanned
+        month): the row position, the absolute month index
+        (year * 12 + month - 1) and the days worked in that month. Rows with
+        a missing date or with start > end have no entries.
+    """
+    start = _to_days(proj_start)
+    end = _to_days(proj_end)
+
+    valid = ~(np.isnat(start) | np.isnat(end))
+    valid[valid] = start[valid] <= end[valid]
+
+#   Absolute month numbers, counted from 1970-01
+    first_month = np.zeros(len(start), dtype=np.int64)
+    last_month = np.zeros(len(start), dtype=np.int64)
+    first_month[valid] = start[valid].astype('datetime64[M]').astype(np.int64)
+    last_month[valid] = end[valid].astype('datetime64[M]').astype(np.int64)
+
+#   One entry per month of every row's own span
+    span = np.where(valid, last_month - first_month + 1, 0)
+    row = np.repeat(np.arange(len(start)), span)
+    offset = np.arange(len(row)) - np.repeat(np.cumsum(span) - span, span)
+    month_index = first_month[row] + offset
+
+#   Clip every interval to the boundaries of each spanned month
+    month_start = month_index.astype('datetime64[M]').astype('datetime64[D]')
+    month_end = (month_index + 1).astype('datetime64[M]').astype('datetime64[D]')
+    lower = np.maximum(month_start, start[row])
+    upper = np.minimum(month_end, end[row] + 1)
+    days = (upper - lower).astype(np.int64)
+
+    return row, month_index + 1970 * 12, days
+
+
+def days_worked_by_month(proj_start, proj_end):
+    """
+    Days worked in each month name, summed over years.
+
+    Args:
+        proj_start (pd.Series | array-like): Project start dates.
+        proj_end (pd.Series | array-like): Project end dates.
+
+    Returns:
+        pd.DataFrame: One int64 column per month name ("January" ...
+        "December"), one row per project row.
+    """
+    row, month_index, days = month_overlap_days(proj_start, proj_end)
+    rows = len(proj_start)
+
+#   Fold every spanned month into its month-of-year bucket
+    counts = np.bincount(row * 12 + month_index % 12, weights=days,
+                         minlength=rows * 12)
+    return pd.DataFrame(counts.reshape(rows, 12).astype(np.int64),
+                        columns=MONTHS)
+
+
+def month_periods(period_start, period_end):
+    """
+    Build the (year, month) periods of a reporting window.
+
+    Args:
+        period_start (str | pd.Timestamp): First month of the window,
+        e.g. "2024-01".
+        period_end (str | pd.Timestamp): Last month of the window (inclusive).
+
+    Returns:
+        pd.PeriodIndex: Monthly periods from period_start to period_end.
+
+    Raises:
+        ValueError: If the window is empty or a bound is not a valid month.
+    """
+    periods = pd.period_range(pd.Period(period_start, freq='M'),
+                              pd.Period(period_end, freq='M'), freq='M')
+    if len(periods) == 0:
+        raise ValueError(
+            f"Reporting window {period_start} - {period_end} is empty")
+    return periods
+
+
+def period_labels(periods):
+    """
+    Column labels for monthly periods, e.g. "January-2024".
+
+    Args:
+        periods (pd.PeriodIndex): Monthly periods.
+
+    Returns:
+        list: One label per period.
+    """
+    return list(periods.strftime('%B-%Y'))
+
+
+def period_fractions(proj_start, proj_end, periods):
+    """
+    Fraction of every (year, month) period each project row was worked.
+
+    Days are divided by the real length of that month, so February has
+    29 days in leap years, and fractions are rounded up to 2 decimals.
+
+    Args:
+        proj_start (pd.Series | array-like): Project start dates.
+        proj_end (pd.Series | array-like): Project end dates.
+        periods (pd.PeriodIndex): Monthly periods of the reporting window.
+
+    Returns:
+        np.ndarray: float64 array of shape (rows, len(periods)).
+    """
+    row, month_index, days = month_overlap_days(proj_start, proj_end)
+    first = periods[0].year * 12 + periods[0].month - 1
+
+#   Drop the spanned months that fall outside the window
+    column = month_index - first
+    inside = (column >= 0) & (column < len(periods))
+    window_days = np.zeros((len(proj_start), len(periods)))
+    window_days[row[inside], column[inside]] = days[inside]
+
+    return np.ceil(window_days / periods.days_in_month.to_numpy() * 100) / 100
+
+
+def employee_groups(emp_id):
+    """
+    Factorize employee IDs and sort the rows by employee.
+
+    Args:
+        emp_id (pd.Series | array-like): Employee ID of every row.
+
+    Returns:
+        tuple: (employees, codes, order, starts) - the sorted unique IDs,
+        the employee code of every row (-1 for a missing ID), the row order
+        that groups rows by employee (stable, rows without an ID dropped)
+        and the position in that order where every employee starts.
+    """
+    codes, employees = pd.factorize(np.asarray(emp_id), sort=True)
+    order = np.argsort(codes, kind='stable')
+    order = order[codes[order] >= 0]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1) != 0)
+    return np.asarray(employees), codes, order, starts
+
+
+def group_sums(values, order, starts):
+    """
+    Sum row values per employee, skipping NaN like DataFrame.sum does.
+
+    Args:
+        values (np.ndarray): 1-D or 2-D (rows x columns) numeric values.
+        order (np.ndarray): Row order from employee_groups.
+        starts (np.ndarray): Group starts from employee_groups.
+
+    Returns:
+        np.ndarray: One row of sums per employee.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=float)[order], nan=0.0)
+    if len(starts) == 0:
+        return np.zeros((0,) + values.shape[1:])
+    return np.add.reduceat(values, starts, axis=0)
+
+
+def group_unique(values, codes, order):
+    """
+    Unique values of every employee, in order of first appearance.
+
+    One stable sort by employee and one hash pass over (employee, value)
+    pairs replace a Python-level unique() per group.
+
+    Args:
+        values (pd.Series | array-like): Row values.
+        codes (np.ndarray): Employee codes from employee_groups.
+        order (np.ndarray): Row order from employee_groups.
+
+    Returns:
+        np.ndarray: Object array holding one array of unique values per
+        employee.
+    """
+    sorted_values = np.asarray(values)[order]
+    sorted_codes = codes[order]
+    value_codes, uniques = pd.factorize(sorted_values)
+    pair = sorted_codes * (len(uniques) + 1) + value_codes + 1
+    first = ~pd.Series(pair).duplicated().to_numpy()
+
+    kept = sorted_values[first]
+    bounds = np.flatnonzero(np.diff(sorted_codes[first], prepend=-1,
+                                    append=-1) != 0).tolist()
+    result = np.empty(max(len(bounds) - 1, 0), dtype=object)
+    for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        result[i] = kept[lo:hi]
+    return result
+
+
+def aggregate_by_employee(frame, agg):
+    """
+    Group rows by Emp_ID with 'unique' and 'sum' aggregations.
+
+    Equivalent to frame.groupby('Emp_ID').agg(agg).reset_index(), built on
+    factorized employee codes, np.add.reduceat sums and sort-based unique
+    values.
+
+    Args:
+        frame (pd.DataFrame): Rows with an "Emp_ID" column.
+        agg (dict): Column -> 'unique' or 'sum'.
+
+    Returns:
+        pd.DataFrame: One row per employee: Emp_ID, then the agg columns.
+    """
+    employees, codes, order, starts = employee_groups(frame['Emp_ID'])
+    sum_columns = [col for col, how in agg.items() if how == 'sum']
+    sums = group_sums(frame[sum_columns].to_numpy(dtype=float), order, starts)
+
+    columns = {'Emp_ID': employees}
+    for col, how in agg.items():
+        if how == 'sum':
+            columns[col] = sums[:, sum_columns.index(col)]
+        elif how == 'unique':
+            columns[col] = group_unique(frame[col], codes, order)
+        else:
+            raise ValueError(f"Unsupported aggregation {how!r} for {col}")
+    return pd.DataFrame(columns)
+
+
+def merge_employee_partials(partials, agg):
+    """
+    Merge per-chunk results of aggregate_by_employee into one.
+
+    Sums are added up and the unique values are re-deduplicated in chunk
+    order, so merging the chunks of a sheet in order gives the same values
+    as aggregating it at once.
+
+    Args:
+        partials (list): aggregate_by_employee frames of consecutive chunks.
+        agg (dict): The aggregation the partials were built with.
+
+    Returns:
+        pd.DataFrame: One row per employee, laid out like the partials.
+    """
+    frame = pd.concat(partials, ignore_index=True)
+    employees, codes, order, starts = employee_groups(frame['Emp_ID'])
+    sum_columns = [col for col, how in agg.items() if how == 'sum']
+    sums = group_sums(frame[sum_columns].to_numpy(dtype=float), order, starts)
+
+    columns = {'Emp_ID': employees}
+    for col, how in agg.items():
+        if how == 'sum':
+            columns[col] = sums[:, sum_columns.index(col)]
+            continue
+#       Flatten the unique arrays back into rows of (employee, value)
+        cells = frame[col].tolist()
+        lengths = np.fromiter(map(len, cells), dtype=np.int64, count=len(cells))
+        values = np.concatenate(cells) if cells else np.empty(0, dtype=object)
+        value_codes = np.repeat(codes, lengths)
+        columns[col] = group_unique(
+            values, value_codes, np.argsort(value_codes, kind='stable'))
+    return pd.DataFrame(columns)
+
+
+def revenue_matrix(emp_id, monthly_revenue, fractions):
+    """
+    Sum the per-row revenue of every period into an employees x periods matrix.
+
+    Args:
+        emp_id (pd.Series | array-like): Employee ID of every project row.
+        monthly_revenue (pd.Series | array-like): Monthly revenue of every row.
+        fractions (np.ndarray): Period fractions from period_fractions.
+
+    Returns:
+        np.ndarray: Sorted unique employee IDs, and a float64 matrix of shape
+        (employees, periods) with the revenue earned in each period.
+    """
+    employees, codes, order, starts = employee_groups(emp_id)
+#   A PO rate over a zero-day timeline gives inf revenue; inf * 0 is NaN and
+#   summed as 0, like DataFrame.multiply did without warning
+    with np.errstate(invalid='ignore', over='ignore'):
+        revenue = fractions * np.asarray(monthly_revenue, dtype=float)[:, None]
+    return employees, group_sums(revenue, order, starts)
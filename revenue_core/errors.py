@@ -0,0 +1,58 @@
+class ReportError(Exception):
+    """
+    Base class of the errors raised for an input the pipeline cannot
+    report on.
+
+    Every error type carries the HTTP status the web app answers with, so
+    callers outside the web app can ignore it.
+
+    Attributes:
+        message (str): Error shown to the user.
+        status (int): HTTP status of the error response.
+    """
+
+    status = 400
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.message = message
+        if status is not None:
+            self.status = status
+
+
+class EmptyInputError(ReportError):
+    """
+    The data file has no rows.
+    """
+
+
+class InvalidInputError(ReportError):
+    """
+    The data file cannot be parsed or processed.
+    """
+
+
+class MissingSheetError(ReportError):
+    """
+    A sheet the report needs, usually the expenses (Sheet2), is missing.
+    """
+
+
+class InvalidWindowError(ReportError):
+    """
+    The reporting window is not a pair of months, or ends before it starts.
+    """
+
+
+class InvalidColumnsError(ReportError):
+    """
+    A Sheet1 or Sheet2 column the report needs is missing.
+    """
+
+
+class UnknownMonthError(ReportError):
+    """
+    No month, or a month the data does not have, was selected.
+    """
+
+    status = 404
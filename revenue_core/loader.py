@@ -0,0 +1,374 @@
+import logging
+import os
+import time
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from .errors import InvalidInputError, MissingSheetError
+
+
+logger = logging.getLogger('logger')
+
+# Strings pd.read_excel treats as missing by default (e.g. "NA" dates of
+# bench rows)
+NA_STRINGS = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null'
+]
+
+# Column types of the allocation sheet, applied once right after parsing
+SHEET1_DATE_COLUMNS = ['Proj_start', 'Proj_end']
+SHEET1_NUMERIC_COLUMNS = ['Month_sal', 'Rate_per_day', 'Rate_per_month',
+                          'Rate_PO']
+
+# Text columns of the allocation sheet, kept as strings when read from CSV
+SHEET1_TEXT_COLUMNS = ['Name', 'Project', 'PO_No']
+
+# Rows per chunk when Sheet1 is processed piecewise
+CHUNK_ROWS = 50000
+
+# File extension -> input format; anything else is read as an Excel workbook
+TABLE_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+
+# Legacy workbooks openpyxl cannot open
+LEGACY_EXCEL_EXTENSIONS = ('.xls',)
+
+
+def _type_sheet1(sheet1):
+    """
+    Coerce the Sheet1 date and rate columns to their expected dtypes.
+
+    Args:
+        sheet1 (pd.DataFrame): Raw allocation sheet.
+
+    Returns:
+        pd.DataFrame: The same frame with typed columns.
+    """
+    for col in SHEET1_DATE_COLUMNS:
+        if col in sheet1.columns:
+            sheet1[col] = pd.to_datetime(sheet1[col])
+    for col in SHEET1_NUMERIC_COLUMNS:
+        if col in sheet1.columns:
+            sheet1[col] = pd.to_numeric(sheet1[col])
+    return sheet1
+
+
+def _records_frame(columns, records):
+    """
+    Build a DataFrame from worksheet rows, with empty cells and the
+    NA_STRINGS as NaN.
+
+    Args:
+        columns (list): Column names.
+        records (list): Row tuples, cut to the header width.
+
+    Returns:
+        pd.DataFrame: The rows with inferred dtypes.
+    """
+    frame = pd.DataFrame.from_records(records, columns=columns)
+    for col in frame.columns[frame.dtypes == object]:
+        frame[col] = frame[col].mask(frame[col].isin(NA_STRINGS))
+    return frame.fillna(np.nan).infer_objects()
+
+
+def _read_sheet(worksheet):
+    """
+    Stream a read-only worksheet into a DataFrame.
+
+    The first row is the header; trailing empty rows and unnamed trailing
+    columns are dropped like pd.read_excel does, and empty cells and the
+    NA_STRINGS become NaN.
+
+    Args:
+        worksheet (openpyxl.worksheet.ReadOnlyWorksheet): Sheet to read.
+
+    Returns:
+        pd.DataFrame: The sheet contents with inferred dtypes.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    records = list(rows)
+    while records and all(value is None for value in records[-1]):
+        records.pop()
+
+    header = list(header)
+    while header and header[-1] is None and \
+            all(len(record) < len(header) or record[len(header) - 1] is None
+                for record in records):
+        header.pop()
+    width = len(header)
+    columns = [name if name is not None else f"Unnamed: {i}"
+               for i, name in enumerate(header)]
+
+    return _records_frame(columns, [record[:width] for record in records])
+
+
+def open_workbook(source):
+    """
+    Open a workbook in read-only mode, or pass an open one through.
+
+    Args:
+        source (str | file-like | openpyxl.Workbook): The input Excel file.
+
+    Returns:
+        openpyxl.Workbook: The read-only workbook. The caller closes it
+        unless it passed it in.
+    """
+    if isinstance(source, openpyxl.Workbook):
+        return source
+    return openpyxl.load_workbook(source, read_only=True, data_only=True,
+                                  keep_links=False)
+
+
+def read_input_workbook(input_data_path, sheet_names=('Sheet1', 'Sheet2')):
+    """
+    Open the uploaded workbook once and parse all the sheets we need from it.
+
+    The zip container and workbook XML are read a single time, and the rows
+    are streamed with openpyxl in read-only mode straight into DataFrames,
+    instead of once per pd.read_excel call with per-cell conversion.
+
+    Args:
+        input_data_path (str | file-like | openpyxl.Workbook): The input
+        Excel file; an open workbook is read and left open.
+        sheet_names (tuple): Sheets to parse; missing sheets are skipped.
+
+    Returns:
+        dict: Sheet name -> pd.DataFrame for every sheet found, plus a
+        "timings" entry mapping each load phase to its seconds.
+    """
+    timings = {}
+    started = time.perf_counter()
+    sheets = {}
+    workbook = open_workbook(input_data_path)
+    try:
+        timings['open'] = time.perf_counter() - started
+        for name in sheet_names:
+            if name not in workbook.sheetnames:
+                continue
+            sheet_started = time.perf_counter()
+            sheets[name] = _read_sheet(workbook[name])
+            timings[name] = time.perf_counter() - sheet_started
+    finally:
+        if workbook is not input_data_path:
+            workbook.close()
+
+    if 'Sheet1' in sheets:
+        typing_started = time.perf_counter()
+        sheets['Sheet1'] = _type_sheet1(sheets['Sheet1'])
+        timings['typing'] = time.perf_counter() - typing_started
+    timings['total'] = time.perf_counter() - started
+
+    logger.info("Workbook loaded in one pass: " + ", ".join(
+        f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in timings.items()))
+    sheets['timings'] = timings
+    return sheets
+
+
+def table_format(filename):
+    """
+    Detect the input format of an uploaded or local file from its name.
+
+    Args:
+        filename (str): File name or path.
+
+    Returns:
+        str: "csv", "parquet" or "excel".
+
+    Raises:
+        InvalidInputError: For a legacy .xls workbook.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in LEGACY_EXCEL_EXTENSIONS:
+        raise InvalidInputError("Legacy .xls workbooks are not supported, please save the file as .xlsx and upload it again")
+    return TABLE_FORMATS.get(extension, 'excel')
+
+
+def _csv_options(sheet_name):
+    """
+    Typed read_csv options: the Sheet1 text columns stay strings and the
+    project dates are parsed while reading.
+    """
+    if sheet_name != 'Sheet1':
+        return {}
+    return {'dtype': {col: str for col in SHEET1_TEXT_COLUMNS},
+            'parse_dates': SHEET1_DATE_COLUMNS}
+
+
+def read_table(source, input_format, sheet_name='Sheet1'):
+    """
+    Read the Sheet1 (allocations) or Sheet2 (expenses) table of one file.
+
+    CSV and Parquet exports skip the Excel parsing entirely: CSV is read
+    with declared dtypes and parse_dates, Parquet carries its own types.
+
+    Args:
+        source (str | file-like): The input file.
+        input_format (str): "csv", "parquet" or "excel" (see table_format).
+        sheet_name (str): Which table the file holds; for Excel also the
+        sheet to read.
+
+    Returns:
+        pd.DataFrame: The table, with Sheet1 columns typed like the
+        workbook loader does.
+
+    Raises:
+        ImportError: If Parquet is read without pyarrow or fastparquet.
+        MissingSheetError: If an Excel file has no such sheet.
+    """
+    if input_format == 'csv':
+        frame = pd.read_csv(source, **_csv_options(sheet_name))
+    elif input_format == 'parquet':
+        frame = pd.read_parquet(source)
+    else:
+        sheets = read_input_workbook(source, sheet_names=(sheet_name,))
+        if sheet_name not in sheets:
+            raise MissingSheetError(f"Worksheet named '{sheet_name}' not found")
+        return sheets[sheet_name]
+    logger.info(f"{input_format} file read ({sheet_name}), {len(frame)} rows")
+    return _type_sheet1(frame) if sheet_name == 'Sheet1' else frame
+
+
+def get_sheet(input_data, sheet_name):
+    """
+    Return a sheet from a pre-loaded workbook, or read it from a path.
+
+    Args:
+        input_data (dict | str | file-like): Result of read_input_workbook,
+        or the path of the input Excel file. A CSV or Parquet path holds
+        Sheet1 only.
+        sheet_name (str): Sheet to fetch.
+
+    Returns:
+        pd.DataFrame: The requested sheet.
+
+    Raises:
+        MissingSheetError: If the workbook has no such sheet.
+    """
+    if isinstance(input_data, dict):
+        if sheet_name not in input_data:
+            raise MissingSheetError(f"Worksheet named '{sheet_name}' not found")
+#       Shallow copy so the stages can add columns without touching the
+#       shared frame
+        return input_data[sheet_name].copy(deep=False)
+    if isinstance(input_data, str) and table_format(input_data) != 'excel':
+        if sheet_name != 'Sheet1':
+            raise MissingSheetError(f"Worksheet named '{sheet_name}' not found")
+        return read_table(input_data, table_format(input_data))
+    with pd.ExcelFile(input_data) as workbook:
+        if sheet_name not in workbook.sheet_names:
+            raise MissingSheetError(f"Worksheet named '{sheet_name}' not found")
+        return workbook.parse(sheet_name)
+
+
+def _stream_sheet_chunks(input_data_path, sheet_name, chunk_size):
+    """
+    Stream a worksheet in read-only mode, chunk_size rows at a time.
+
+    Only one chunk of rows is held in memory. Trailing empty rows are
+    dropped like _read_sheet does, so the chunks line up with slices of the
+    fully loaded sheet.
+
+    Args:
+        input_data_path (str | file-like | openpyxl.Workbook): The input
+        Excel file; an open workbook is streamed and left open.
+        sheet_name (str): Sheet to stream.
+        chunk_size (int): Rows per chunk.
+
+    Yields:
+        pd.DataFrame: Consecutive row chunks, indexed by their row position.
+
+    Raises:
+        MissingSheetError: If the workbook has no such sheet.
+    """
+    workbook = open_workbook(input_data_path)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise MissingSheetError(f"Worksheet named '{sheet_name}' not found")
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            yield pd.DataFrame()
+            return
+
+        header = list(header)
+        while header and header[-1] is None:
+            header.pop()
+        width = len(header)
+        columns = [name if name is not None else f"Unnamed: {i}"
+                   for i, name in enumerate(header)]
+
+        records = []
+        blank_rows = 0
+        offset = 0
+        for record in rows:
+            record = record[:width]
+            if all(value is None for value in record):
+#               Held back until a filled row shows they are not trailing
+                blank_rows += 1
+                continue
+            for blank in [(None,) * width] * blank_rows + [record]:
+                records.append(blank)
+                if len(records) == chunk_size:
+                    chunk = _records_frame(columns, records)
+                    chunk.index += offset
+                    yield chunk
+                    offset += len(records)
+                    records = []
+            blank_rows = 0
+        if records or offset == 0:
+            chunk = _records_frame(columns, records)
+            chunk.index += offset
+            yield chunk
+    finally:
+        if workbook is not input_data_path:
+            workbook.close()
+
+
+def iter_sheet_chunks(input_data, sheet_name, chunk_size=CHUNK_ROWS):
+    """
+    Return a sheet in consecutive chunks of chunk_size rows.
+
+    A pre-loaded workbook is sliced; an Excel path or file is streamed row by
+    row with openpyxl and a CSV path with chunked read_csv, so very large
+    sheets are never held in memory at once. Both give the same chunks for
+    the same sheet.
+
+    Args:
+        input_data (dict | str | file-like | openpyxl.Workbook): Result of
+        read_input_workbook, or the input Excel file (path, file or open
+        workbook), or a CSV / Parquet path holding Sheet1.
+        sheet_name (str): Sheet to fetch.
+        chunk_size (int): Rows per chunk.
+
+    Yields:
+        pd.DataFrame: Consecutive row chunks (Sheet1 chunks are typed); an
+        empty sheet gives one empty chunk.
+
+    Raises:
+        MissingSheetError: If the workbook has no such sheet.
+    """
+    if isinstance(input_data, str) and table_format(input_data) == 'csv' \
+            and sheet_name == 'Sheet1':
+        chunks = 0
+        with pd.read_csv(input_data, chunksize=chunk_size,
+                         **_csv_options(sheet_name)) as reader:
+            for chunks, chunk in enumerate(reader, start=1):
+                yield _type_sheet1(chunk)
+        if chunks == 0:
+            yield _type_sheet1(pd.read_csv(input_data, nrows=0,
+                                           **_csv_options(sheet_name)))
+        return
+    if isinstance(input_data, dict) or isinstance(input_data, str) and \
+            table_format(input_data) != 'excel':
+        frame = get_sheet(input_data, sheet_name)
+        for start in range(0, max(len(frame), 1), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+        return
+    for chunk in _stream_sheet_chunks(input_data, sheet_name, chunk_size):
+        yield _type_sheet1(chunk) if sheet_name == 'Sheet1' else chunk
@@ -0,0 +1,731 @@
+import datetime
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .cache import ResultCache, content_digest
+from .engine import (MONTHS, aggregate_by_employee, days_worked_by_month,
+                     merge_employee_partials, month_periods,
+                     period_fractions, period_labels, revenue_matrix)
+from .errors import (EmptyInputError, InvalidColumnsError, InvalidInputError,
+                     InvalidWindowError, MissingSheetError, ReportError,
+                     UnknownMonthError)
+from .loader import (CHUNK_ROWS, get_sheet, iter_sheet_chunks, open_workbook,
+                     read_input_workbook, read_table, table_format)
+from .writer import REPORT_FORMATS
+
+
+logger = logging.getLogger('logger')
+
+# Parsed-upload cache of this process, used by the report tasks; see
+# set_task_cache
+task_cache = None
+
+
+# Employee detail columns leading the Monthly_MIS report
+EMPLOYEE_COLUMNS = ['Emp_ID', 'Name', 'Month_sal', 'Project', 'PO_No',
+                    'Proj_start', 'Proj_end']
+
+# Sheet1 columns carried from every allocation row into the aggregation
+ALLOCATION_COLUMNS = ['Emp_ID', 'Name', 'Month_sal', 'Project', 'PO_No',
+                      'Monthly_revenue', 'Proj_start', 'Proj_end']
+
+# Rent, Professional Fees, Other Operating Cost, Stipend Expenses,
+# Asstes(Laptop, Headphone etc), Annual Meet Expense, Taxes(Advance & SA Tax),
+# Month_sal and Total_Expenses leading the Operating_Cost report
+EXPENSE_COLUMNS = ['Rent', 'Professional Fees', 'Other Operating Cost',
+                   'Stipend Expenses', 'Asstes (Laptop, Headphone etc)',
+                   'Annual Meet Expense', 'Taxes (Advance & SA Tax)',
+                   'Month_sal', 'Total_Expenses']
+
+
+def _allocation_revenue(data, periods=None):
+    """
+    Work out the monthly revenue and month fractions of every allocation row.
+
+    Args:
+        data (pd.DataFrame): Sheet1 rows.
+        periods (pd.PeriodIndex, optional): Reporting window; None buckets
+        the revenue by month name.
+
+    Returns:
+        tuple: (ALLOCATION_COLUMNS of every allocation row, float64 array of
+        shape (rows, months) with the fraction of each month worked).
+    """
+    if periods is None:
+#       Count the days worked in each month for all project rows at once
+        df = days_worked_by_month(data["Proj_start"], data["Proj_end"])
+        Month_df = df[MONTHS] / \
+            [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+        fractions = (np.ceil(Month_df * 100) / 100).to_numpy()
+    else:
+#       One column per (year, month) period of the reporting window
+        fractions = period_fractions(data["Proj_start"], data["Proj_end"],
+                                     periods)
+    x = (data['Proj_end'] - data['Proj_start']).dt.days
+    data["proj_Timeline"] = x / 30
+
+#   Create boolean masks for Rate_per_day, Rate_per_month, and Rate_PO
+    mask_day = data['Rate_per_day'] > 0
+    mask_month = data['Rate_per_month'] > 0
+    mask_po = data['Rate_PO'] > 0
+
+#   Use np.where to conditionally calculate Monthly_revenue
+    data['Monthly_revenue'] = pd.Series(
+        np.where(
+            mask_day, data['Rate_per_day'] * 21,
+            np.where(
+                mask_month, data['Rate_per_month'],
+                np.where(mask_po, data['Rate_PO'] / data['proj_Timeline'],
+                         0))), index=data.index)
+    return data[ALLOCATION_COLUMNS], fractions
+
+
+def reporting_periods(period_start=None, period_end=None):
+    """
+    The (year, month) periods of a reporting window; a single bound gives a
+    one-month window.
+
+    Args:
+        period_start (str, optional): First month of the window, e.g.
+        "2024-01".
+        period_end (str, optional): Last month of the window.
+
+    Returns:
+        pd.PeriodIndex: The periods, or None without a window.
+
+    Raises:
+        InvalidWindowError: If a bound is not a month or the window ends
+        before it starts.
+    """
+    if period_start is None and period_end is None:
+        return None
+    try:
+        return month_periods(period_start or period_end,
+                             period_end or period_start)
+    except (TypeError, ValueError) as e:
+        window = ' - '.join(str(bound) for bound in (period_start, period_end)
+                            if bound is not None)
+        error_message = f"Invalid reporting window {window}, please give YYYY-MM months with the start month first"
+        logger.error(error_message)
+        raise InvalidWindowError(error_message) from e
+
+
+def process_data(input_data_path, period_start=None, period_end=None,
+                 chunk_size=CHUNK_ROWS):
+    """
+    Process the input data from an Excel file 
+    and calculate revenue of employee.
+
+    Without a reporting window the revenue is bucketed by month name, so the
+    same month of different years is summed into one column. With a window
+    every (year, month) period gets its own column, labelled e.g.
+    "January-2024", and leap years are taken into account.
+
+    Sheet1 is processed chunk_size rows at a time and the per-employee
+    partial results are merged, so a path is streamed with bounded memory
+    and gives the same result as the loaded workbook.
+
+    Args:
+        input_data_path (str | file-like | openpyxl.Workbook | dict): The
+        input Excel file, or the sheets already loaded by
+        read_input_workbook.
+        period_start (str, optional): First month of the reporting window,
+        e.g. "2024-01".
+        period_end (str, optional): Last month of the reporting window.
+        chunk_size (int, optional): Sheet1 rows per chunk.
+
+    Returns:
+        pd.DataFrame(grouped_df): A DataFrame containing processed data.
+
+    Raises:
+        EmptyInputError: If the input Excel file is empty.
+        InvalidInputError: If the input Excel file contains invalid content.
+        InvalidWindowError: If the reporting window is not valid.
+    """
+
+#   Checked before the file is read, so a bad window is not blamed on it
+    periods = reporting_periods(period_start, period_end)
+    try:
+        month_columns = MONTHS
+        if periods is not None:
+            month_columns = period_labels(periods)
+            logger.info(f"Reporting window : {month_columns[0]} - {month_columns[-1]}")
+
+#       Group data by month and aggregate project-related information into list
+        row_agg = {
+            'Name': 'unique',
+            'Project': 'unique',
+            'PO_No': 'unique',
+            'Month_sal': 'unique',
+            'Monthly_revenue': 'sum',
+            'Proj_start': 'unique',
+            'Proj_end': 'unique',
+        }
+        agg = {**row_agg, **{month: 'sum' for month in month_columns}}
+        grouped_df = None
+        chunks = 0
+        for data in iter_sheet_chunks(input_data_path, 'Sheet1', chunk_size):
+            allocations, fractions = _allocation_revenue(
+                data.copy(deep=False), periods)
+#           The month revenue goes straight into the employees x months
+#           matrix, without a rows x months frame in between
+            _, revenue = revenue_matrix(allocations['Emp_ID'],
+                                        allocations['Monthly_revenue'],
+                                        fractions)
+            partial = pd.concat([
+                aggregate_by_employee(allocations, row_agg),
+                pd.DataFrame(revenue, columns=month_columns)
+            ], axis=1)
+            grouped_df = partial if grouped_df is None else \
+                merge_employee_partials([grouped_df, partial], agg)
+            chunks += 1
+        logger.info(f"File reading done (Sheet1), {chunks} chunk(s)")
+#       Return the processed data or any relevant results
+        return grouped_df
+    except pd.errors.EmptyDataError as e:
+        error_message = "Error: The input Excel file is empty."
+        logger.error(error_message)
+        raise EmptyInputError(error_message) from e
+
+    except pd.errors.ParserError as e:
+        error_message = "Error: The input Excel file contains invalid content, Please select valid input file"
+        logger.error(error_message)
+        raise InvalidInputError(error_message) from e
+    except Exception as e:
+        error_message = "Error: The input Excel file contains invalid content, Please select valid input file"
+        logger.error(error_message)
+        raise InvalidInputError(error_message) from e
+
+
+def _monthly_salary(values):
+    """
+    Monthly salary of one employee from its aggregated 'unique' Month_sal.
+
+    An employee with several salaries in Sheet1 (e.g. a raise between two
+    allocations) is costed at the highest of them.
+
+    Args:
+        values (np.ndarray | scalar): Unique salaries of one employee.
+
+    Returns:
+        float: The salary, NaN if none is given.
+    """
+    return np.fmax.reduce(np.atleast_1d(values).astype(float))
+
+
+def _month_table(grouped_df, months):
+    """
+    Build the employee table with revenue, P&L and P&L % of every month.
+
+    The P&L of all months is computed at once over the employee x month
+    revenue matrix and laid out in one preallocated block whose column
+    order is known up front, so no per-month frames are concatenated.
+
+    Args:
+        grouped_df (pd.DataFrame): Output of process_data.
+        months (list): Selected month columns; repeats are ignored.
+
+    Returns:
+        pd.DataFrame: Employee detail columns, with the numeric monthly
+        salary the P&L is computed from, followed by
+        [<month>, P_L_<month>, P_L_<month>_%] for every month, rounded to 2
+        decimals.
+
+    Raises:
+        KeyError: If a month or detail column is missing.
+        ValueError: If there is no employee data.
+    """
+    if grouped_df.empty:
+        raise ValueError("No employee data to report")
+    months = list(dict.fromkeys(months))
+
+    revenue = grouped_df[months].to_numpy(dtype=float)
+    salary = grouped_df['Month_sal'].map(_monthly_salary).to_numpy(dtype=float)
+    profit_loss = revenue - salary[:, None]
+    profit_loss_pct = np.divide(profit_loss * 100, revenue,
+                                out=np.zeros_like(revenue), where=revenue > 0)
+
+    month_columns = [col for month in months
+                     for col in (month, f"P_L_{month}", f"P_L_{month}_%")]
+    block = np.empty((len(grouped_df), len(month_columns)))
+    block[:, 0::3] = revenue
+    block[:, 1::3] = profit_loss
+    block[:, 2::3] = profit_loss_pct
+
+    return pd.concat([
+        grouped_df[EMPLOYEE_COLUMNS].assign(Month_sal=salary).round(2),
+        pd.DataFrame(block.round(2), columns=month_columns,
+                     index=grouped_df.index)
+    ], axis=1)
+
+
+def _operating_cost_table(final_df, months):
+    """
+    Build the overall expenses table with revenue and P&L of every month.
+
+    Args:
+        final_df (pd.DataFrame): Sheet2 expenses with Month_sal,
+        Total_Expenses and the summed revenue of every month.
+        months (iterable): Month columns of final_df.
+
+    Returns:
+        pd.DataFrame: The expense columns followed by [<month>, P_L_<month>]
+        for every month.
+
+    Raises:
+        KeyError: If an expense column is missing.
+    """
+    overall = {col: final_df[col] for col in EXPENSE_COLUMNS}
+    for month in months:
+        overall[month] = final_df[month]
+        overall[f"P_L_{month}"] = final_df[month] - final_df['Total_Expenses']
+    return pd.DataFrame(overall)
+
+
+def _format_value(value):
+    """
+    Render one employee detail value for the report.
+
+    Args:
+        value: A name, project, PO number or project date.
+
+    Returns:
+        str: "NA" for missing values, YYYY-MM-DD for dates, else str(value).
+    """
+    if pd.isna(value):
+        return 'NA'
+    if isinstance(value, (datetime.date, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _join_values(values):
+    """
+    Join the unique values of one employee into a ", " delimited string.
+
+    Args:
+        values (np.ndarray | scalar): Unique values of one employee.
+
+    Returns:
+        str: The formatted values.
+    """
+    if np.ndim(values) == 0:
+        return _format_value(values)
+    return ', '.join(_format_value(value) for value in values)
+
+
+def _format_employee_details(result_df):
+    """
+    Format the multi-valued employee detail columns of the report.
+
+    Name, Project, PO_No and the project dates become delimited strings;
+    Emp_ID and Month_sal stay numeric.
+
+    Args:
+        result_df (pd.DataFrame): Output of _month_table.
+
+    Returns:
+        pd.DataFrame: The same table with formatted detail columns.
+    """
+    for col in ['Name', 'Project', 'PO_No', 'Proj_start', 'Proj_end']:
+        result_df[col] = result_df[col].map(_join_values)
+    return result_df
+
+
+# 2nd function used for fetch revenue of selected month and their profit_loss
+def get_employee_data_by_months(grouped_df, selected_months, input_data_path):
+    """
+    Extract employee data by specified months and calculate revenue with 
+    Profit_Loss.
+
+    Args:
+        grouped_df (pd.DataFrame): 
+        DataFrame containing grouped and processed data.
+        selected_months (list): 
+        List of selected months for data extraction,Profit_Loss Calculations.
+        input_data_path (str | dict): The path to the input Excel file, or
+        the sheets already loaded by read_input_workbook.
+
+    Returns:
+        pd.DataFrame:DataFrames containing employee revenue with Profit_Loss by 
+        selected months and overall profit/loss data.
+
+    Raises:
+        InvalidColumnsError: If a Sheet1 or Sheet2 column is missing.
+        MissingSheetError: If input_data_path has no Sheet2.
+    """
+
+    while True:
+        months = selected_months
+
+#       Check if all specified month columns exist in the DataFrame
+        if all(month in grouped_df.columns for month in months):
+            break           # Break the loop if all months are valid
+        else:
+            invalid_months = [
+                month for month in months if month not in grouped_df.columns]
+            logger.error(
+                f"The following columns do not exist in the DataFrame: {', '.join(invalid_months)}. Please try again.")
+            break
+
+    try:
+        result_df = _month_table(grouped_df, months)
+    except Exception as e:
+        error_message = "Column in input Excel file (Sheet1) is not valid, Please check column name as standard"
+        logger.error(error_message)
+        raise InvalidColumnsError(error_message) from e
+
+#   Turn the multi-valued employee details into delimited text, keeping the
+#   ID, salary and month columns numeric
+    result_df = _format_employee_details(result_df)
+
+#   2nd Requirement - Overall Profit Loss
+    sheet2 = get_sheet(input_data_path, 'Sheet2')
+    logger.info("File reading done (Sheet2)")
+    sheet2['Month_sal'] = result_df['Month_sal'].sum()
+    sheet2['Total_Expenses'] = sheet2.iloc[:, 0:8].sum(axis=1)
+
+    filtered_columns = [col for col in result_df.columns if col in months]
+
+#   Create a new DataFrame with only the desired columns
+    new_df = result_df[filtered_columns]
+    new_df = new_df.sum()
+    a = pd.DataFrame(new_df).T
+    final_df = pd.concat([sheet2, a], axis=1)
+
+    try:
+        result_df1 = _operating_cost_table(final_df, a.columns)
+        return result_df, result_df1
+    except Exception as e:
+        error_message = "Column in input Excel file (Sheet2) is not valid, Please check column name as standard."
+        logger.error(error_message)
+        raise InvalidColumnsError(error_message, 404) from e
+
+
+def month_columns(grouped_df):
+    """
+    Month (or period) columns of a process_data result, in order.
+
+    Args:
+        grouped_df (pd.DataFrame): Output of process_data.
+
+    Returns:
+        list: Column labels after the employee and revenue columns.
+    """
+    return [col for col in grouped_df.columns if col not in ALLOCATION_COLUMNS]
+
+
+def get_full_year_tables(grouped_df, input_data_path):
+    """
+    Build the employee and operating-cost P&L tables for every month once.
+
+    Args:
+        grouped_df (pd.DataFrame): Output of process_data.
+        input_data_path (str | dict): The path to the input Excel file, or
+        the sheets already loaded by read_input_workbook.
+
+    Returns:
+        tuple: (employee table, operating-cost table) covering all months.
+
+    Raises:
+        InvalidColumnsError: As get_employee_data_by_months.
+        MissingSheetError: As get_employee_data_by_months.
+    """
+    return get_employee_data_by_months(
+        grouped_df, month_columns(grouped_df), input_data_path)
+
+
+def select_months(tables, selected_months):
+    """
+    Cut the selected months out of the full-year tables.
+
+    Pure column selection: the P&L amounts and percentages were computed
+    by get_full_year_tables, and each column is independent of the others.
+
+    Args:
+        tables (tuple): Output of get_full_year_tables.
+        selected_months (list): Month columns to report; repeats are ignored.
+
+    Returns:
+        tuple: (employee table, operating-cost table) with the selected
+        months in order, as get_employee_data_by_months would build them.
+
+    Raises:
+        UnknownMonthError: If no month is selected or a month is not in the
+        tables.
+    """
+    employee_table, operating_cost_table = tables
+    months = list(dict.fromkeys(selected_months))
+    unknown = [month for month in months
+               if month not in employee_table.columns]
+    if not months or unknown == ['']:
+        raise UnknownMonthError("Please select at least one month")
+    if unknown:
+        raise UnknownMonthError(
+            f"Months not in the input file: {', '.join(unknown)}")
+    r1 = employee_table[EMPLOYEE_COLUMNS + [
+        col for month in months
+        for col in (month, f"P_L_{month}", f"P_L_{month}_%")]]
+    r2 = operating_cost_table[EXPENSE_COLUMNS + [
+        col for month in months for col in (month, f"P_L_{month}")]]
+    return r1, r2
+
+
+def load_upload(file_path, input_format, expenses_path=None,
+                expenses_format=None, period_start=None, period_end=None,
+                cache=None):
+    """
+    Parse a data file into grouped_df and its full-year P&L tables.
+
+    Args:
+        file_path (str | file-like): The data file.
+        input_format (str): Format of the data file, see table_format.
+        expenses_path (str | file-like, optional): Sheet2 expenses file,
+        required unless the data file is a workbook with a Sheet2.
+        expenses_format (str, optional): Format of the expenses file.
+        period_start (str, optional): First month of the reporting window.
+        period_end (str, optional): Last month of the reporting window.
+        cache (ResultCache, optional): Serves re-uploads of the same bytes
+        and reporting window without parsing anything. Cached values are
+        shared and must be treated as read-only.
+
+    Returns:
+        tuple: (Sheet2 expenses, grouped_df, tables from
+        get_full_year_tables).
+
+    Raises:
+        InvalidWindowError: If the reporting window is not valid.
+        MissingSheetError: If there is no Sheet2.
+        ReportError: If the data cannot be processed.
+    """
+    reporting_periods(period_start, period_end)
+    if cache is not None:
+        cache_key = (
+            input_format, content_digest(file_path), expenses_format,
+            content_digest(expenses_path) if expenses_path is not None
+            else None, period_start, period_end)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Result cache hit {cache_key[1][:12]}")
+            return cached
+        loaded = load_upload(file_path, input_format, expenses_path,
+                             expenses_format, period_start, period_end)
+        cache.put(cache_key, loaded)
+        return loaded
+
+#   One open workbook serves both Sheet2 and the Sheet1 stream
+    workbook = open_workbook(file_path) if input_format == 'excel' else None
+    try:
+        if workbook is not None:
+            input_data = read_input_workbook(
+                workbook,
+                sheet_names=() if expenses_path is not None else ('Sheet2',))
+        else:
+#           CSV / Parquet fast path, no Excel parsing involved
+            input_data = {'Sheet1': read_table(file_path, input_format)}
+        if expenses_path is not None:
+            input_data['Sheet2'] = read_table(expenses_path, expenses_format,
+                                              'Sheet2')
+        if 'Sheet2' not in input_data and workbook is not None:
+            raise MissingSheetError(
+                "Sheet2 not found in the workbook, Please add the expenses sheet (Sheet2) or upload it as a separate file")
+        if 'Sheet2' not in input_data:
+            raise MissingSheetError(
+                "Please upload the expenses file (Sheet2) along with a CSV or Parquet data file")
+
+#       Sheet1 of a workbook is streamed in chunks so large files stay bounded
+        grouped_df = process_data(
+            workbook if workbook is not None else input_data,
+            period_start, period_end)
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+#   P&L of every month, so any month selection is a slice
+    tables = get_full_year_tables(grouped_df, input_data)
+    logger.info("Calling function : get_full_year_tables")
+    return input_data['Sheet2'], grouped_df, tables
+
+
+def selected_months(grouped_df, months, period_start=None, period_end=None):
+    """
+    Resolve a month selection against the columns of grouped_df.
+
+    Args:
+        grouped_df (pd.DataFrame): Output of process_data.
+        months (str): Comma separated months, e.g. "January,February"; with
+        a reporting window also periods such as "January-2024".
+        period_start (str, optional): First month of the reporting window.
+        period_end (str, optional): Last month of the reporting window.
+
+    Returns:
+        list: Month columns to report.
+    """
+    selected = months.replace(" ", "").split(",")
+    if period_start or period_end:
+#       Ticked month names select that month of every year in the
+#       window, no ticked month selects the whole window
+        selected = [
+            period for period in month_columns(grouped_df)
+            if selected == [''] or period in selected
+            or period.split('-')[0] in selected]
+    return selected
+
+
+def report_tables(file_path, input_format, months, period_start=None,
+                  period_end=None, expenses_path=None, expenses_format=None,
+                  cache=None):
+    """
+    Run the whole pipeline for one data file.
+
+    Args:
+        file_path (str | file-like): The data file.
+        input_format (str): Format of the data file, see table_format.
+        months (str): Comma separated month selection.
+        period_start (str, optional): First month of the reporting window.
+        period_end (str, optional): Last month of the reporting window.
+        expenses_path (str | file-like, optional): Sheet2 expenses file.
+        expenses_format (str, optional): Format of the expenses file.
+        cache (ResultCache, optional): Parsed-upload cache, see load_upload.
+
+    Returns:
+        tuple: The (Monthly_MIS, Operating_Cost) tables of the selected
+        months.
+
+    Raises:
+        ReportError: If the data cannot be processed or a selected month
+        is not in it.
+    """
+    _, grouped_df, tables = load_upload(
+        file_path, input_format, expenses_path, expenses_format,
+        period_start, period_end, cache)
+    logger.info("Calling function : process_data")
+    months = selected_months(grouped_df, months, period_start, period_end)
+    logger.info(f"Months Selected :{months}")
+    return select_months(tables, months)
+
+
+def describe_error(error):
+    """
+    Map an exception of the report pipeline to the message and status the
+    user gets.
+
+    Args:
+        error (Exception): Raised while reading or processing an upload.
+
+    Returns:
+        tuple: (message, HTTP status).
+    """
+    if isinstance(error, ReportError):
+        return error.message, error.status
+    if isinstance(error, ImportError):
+        return "Error: Parquet / Arrow support needs pyarrow (or fastparquet for Parquet) installed on the server.", 400
+    if isinstance(error, pd.errors.ParserError):
+        return "Error: The uploaded file is not a valid Excel file.", 404
+    return "Make sure you have provided a vaild input FILE and selected the MONTHS", 404
+
+
+def set_task_cache(cache):
+    """
+    Set the parsed-upload cache the report tasks of this process use.
+
+    The web app passes its own cache when reports run inline; in a report
+    pool every worker process builds one with init_task_cache.
+
+    Args:
+        cache (ResultCache): The cache, or None to parse every upload.
+    """
+    global task_cache
+    task_cache = cache
+
+
+def init_task_cache(max_bytes):
+    """
+    Report pool initializer: give this worker process its own cache.
+
+    Args:
+        max_bytes (int): Memory cap of the cache, 0 disables it.
+    """
+    set_task_cache(ResultCache(max_bytes))
+
+
+def task_cache_stats():
+    """
+    Counters of this process's task_cache, for ReportPool(report=...).
+
+    Returns:
+        dict: ResultCache.stats(), or None without a cache.
+    """
+    return task_cache.stats() if task_cache is not None else None
+
+
+def upload_source(upload):
+    """
+    Where to read an uploaded file a task got, and its format.
+
+    Args:
+        upload (tuple): (filename, bytes), or (filename, path) of a file
+        saved in the request's workspace.
+
+    Returns:
+        tuple: (str | io.BytesIO, format from table_format).
+    """
+    filename, data = upload
+    source = io.BytesIO(data) if isinstance(data, bytes) else data
+    return source, table_format(filename)
+
+
+def entity_report_task(file, expenses, form, output_format, target=None):
+    """
+    Build one report from the raw upload bytes.
+
+    Runs in a report pool or batch process (or inline without one), so only
+    bytes, strings and the form dict go in, and bytes and the one-row
+    Operating_Cost table come out. Uploads are looked up in the task_cache
+    of the process running the task.
+
+    Args:
+        file (tuple): (filename, bytes or saved path) of the data file.
+        expenses (tuple): (filename, bytes or saved path) of the Sheet2
+        file, or None.
+        form (dict): Request form fields (months, period_start, period_end).
+        output_format (str): Key of REPORT_FORMATS.
+        target (str, optional): Path to write the report to instead of
+        returning its bytes.
+
+    Returns:
+        tuple: (200, report bytes (empty when written to target),
+        Operating_Cost table), or the error status, message bytes and None.
+    """
+    buffer = io.BytesIO() if target is None else None
+    try:
+        expenses_path = expenses_format = None
+        if expenses is not None:
+            expenses_path, expenses_format = upload_source(expenses)
+        source, input_format = upload_source(file)
+        r1, r2 = report_tables(
+            source, input_format, form.get('months', ''),
+            form.get('period_start') or None, form.get('period_end') or None,
+            expenses_path, expenses_format, task_cache)
+        REPORT_FORMATS[output_format].write(
+            r1, r2, buffer if target is None else target)
+    except Exception as e:
+        message, status = describe_error(e)
+        logger.error(f"{file[0]}: {message}")
+        return status, message.encode(), None
+    return 200, buffer.getvalue() if target is None else b'', r2
+
+
+def report_task(file, expenses, form, output_format, target=None):
+    """
+    entity_report_task without the Operating_Cost table.
+
+    Returns:
+        tuple: (200, report bytes), or the error status and message bytes.
+    """
+    status, body, _ = entity_report_task(file, expenses, form, output_format,
+                                         target)
+    return status, body
@@ -0,0 +1,146 @@
+import json
+import logging
+
+from . import pipeline
+from .errors import ReportError
+from .pipeline import (load_upload, month_columns, select_months,
+                       selected_months, upload_source)
+from .writer import wire_frame
+
+
+logger = logging.getLogger('logger')
+
+# Tables served by /api/pnl
+PNL_TABLES = ('employees', 'operating_cost')
+JSON_MIMETYPE = 'application/json'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+
+def _json_body(payload, status=200):
+    """
+    A pnl_task result holding a JSON document, laid out like jsonify.
+
+    Returns:
+        tuple: (status, body bytes, mimetype, headers).
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n'
+    return status, body.encode(), JSON_MIMETYPE, {}
+
+
+def _project_columns(table, columns):
+    """
+    Keep the requested columns of a P&L table, in the requested order.
+
+    Args:
+        table (pd.DataFrame): Employee or operating-cost table.
+        columns (list): Requested column names; empty keeps all.
+
+    Returns:
+        pd.DataFrame: The projected table.
+    """
+    if not columns:
+        return table
+    return table[[col for col in columns if col in table.columns]]
+
+
+def _arrow_body(table, total, offset):
+    """
+    Serialize one P&L table as an Arrow IPC stream.
+
+    Args:
+        table (pd.DataFrame): Projected, paginated table.
+        total (int): Rows before pagination.
+        offset (int): First row of this page.
+
+    Returns:
+        tuple: (200, stream bytes, ARROW_MIMETYPE, X-Total-Count / X-Offset
+        headers).
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    import pyarrow as pa
+
+    arrow_table = pa.Table.from_pandas(wire_frame(table),
+                                       preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return 200, sink.getvalue().to_pybytes(), ARROW_MIMETYPE, {
+        'X-Total-Count': str(total), 'X-Offset': str(offset)}
+
+
+def pnl_task(file, expenses, form, table_names, columns, offset, limit,
+             output_format):
+    """
+    Build the /api/pnl response of an upload.
+
+    Runs in a report pool process (or inline without one), like
+    entity_report_task, and serves repeat uploads from the task_cache.
+
+    Args:
+        file (tuple): (filename, bytes) of the data file.
+        expenses (tuple): (filename, bytes) of the Sheet2 file, or None.
+        form (dict): Request form fields (months, period_start, period_end);
+        no month selects every month.
+        table_names (list): Tables to return, a subset of PNL_TABLES.
+        columns (list): Columns to return; empty returns all.
+        offset (int): First employee row.
+        limit (int): Employee rows to return, None for all.
+        output_format (str): "json", or "arrow" for the first table only.
+
+    Returns:
+        tuple: (HTTP status, body bytes, mimetype, extra headers).
+    """
+    period_start = form.get("period_start") or None
+    period_end = form.get("period_end") or None
+    try:
+        expenses_path = expenses_format = None
+        if expenses is not None:
+            expenses_path, expenses_format = upload_source(expenses)
+        _, grouped_df, tables = load_upload(
+            *upload_source(file), expenses_path, expenses_format,
+            period_start, period_end, pipeline.task_cache)
+        months = selected_months(grouped_df, form.get("months", ""),
+                                 period_start, period_end)
+        if months == ['']:
+            months = month_columns(grouped_df)
+        selected = dict(zip(PNL_TABLES, select_months(tables, months)))
+    except ReportError as e:
+        return _json_body({'error': e.message}, e.status)
+    except ImportError:
+        return _json_body({'error': "Parquet files need pyarrow or fastparquet installed on the server."}, 400)
+    except Exception:
+        logger.exception("P&L API request failed")
+        return _json_body({'error': "Make sure you have provided a vaild input FILE and selected the MONTHS"}, 404)
+
+    unknown = [col for col in columns if not any(
+        col in selected[name].columns for name in table_names)]
+    if unknown:
+        return _json_body({'error': f"Unknown columns: {', '.join(unknown)}"}, 400)
+
+#   Only the employee table is paged, the operating cost is a single row
+    pages = {}
+    for name in table_names:
+        table = _project_columns(selected[name], columns)
+        total = len(table)
+        if name == 'employees':
+            stop = None if limit is None else offset + limit
+            table = table.iloc[offset:stop]
+        pages[name] = (table, total)
+
+    if output_format == 'arrow':
+        try:
+            table, total = pages[table_names[0]]
+            return _arrow_body(
+                table, total, offset if table_names[0] == 'employees' else 0)
+        except ImportError:
+            return _json_body({'error': "Arrow output needs pyarrow installed on the server."}, 400)
+
+    payload = {'months': list(dict.fromkeys(months))}
+    for name, (table, total) in pages.items():
+        payload[name] = {'total': total, **json.loads(table.to_json(
+            orient='split', index=False, date_format='iso'))}
+        if name == 'employees':
+            payload[name].update(offset=offset, limit=limit)
+    return _json_body(payload)
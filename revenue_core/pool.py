@@ -0,0 +1,183 @@
+import concurrent.futures
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+
+logger = logging.getLogger('logger')
+
+# Imported by every worker process before its first task
+PRELOAD_MODULES = ('numpy', 'openpyxl', 'pandas', 'xlsxwriter')
+
+
+class PoolBusy(Exception):
+    """
+    Raised when a ReportPool already has max_pending tasks queued or running.
+    """
+
+
+def warm_worker(modules, setup=None, setup_args=()):
+    """
+    Worker initializer: import the heavy modules once, up front.
+
+    Args:
+        modules (tuple): Module names to import.
+        setup (callable, optional): Module level function called with
+        setup_args once the modules are imported, e.g. to build per-process
+        state such as a cache.
+        setup_args (tuple): Picklable arguments of setup.
+    """
+    for module in modules:
+        importlib.import_module(module)
+    if setup is not None:
+        setup(*setup_args)
+
+
+def _ready():
+    return True
+
+
+def _run_task(fn, args, report):
+    """
+    Run one task in a worker and tag its result with the worker's state.
+
+    Returns:
+        tuple: (fn(*args), worker process ID, report() or None).
+    """
+    result = fn(*args)
+    return result, os.getpid(), report() if report is not None else None
+
+
+class ReportPool:
+    """
+    Bounded process pool for the CPU-bound report stages.
+
+    Tasks run in separate processes, so a large upload no longer holds the
+    GIL of the process serving requests. Task functions must be module
+    level, and their arguments and results should be plain bytes / str /
+    dict values so nothing large is pickled twice. At most max_pending
+    tasks are queued or running; submit raises PoolBusy beyond that
+    instead of letting requests pile up.
+    """
+
+    def __init__(self, workers, max_pending, preload=PRELOAD_MODULES,
+                 setup=None, setup_args=(), report=None):
+        """
+        Args:
+            workers (int): Worker processes.
+            max_pending (int): Tasks allowed to be queued or running.
+            preload (tuple): Modules every worker imports when it starts,
+            e.g. the module the task functions live in.
+            setup (callable, optional): Called in every worker after the
+            imports, see warm_worker.
+            setup_args (tuple): Arguments of setup.
+            report (callable, optional): Module level function a worker
+            calls after every task; its picklable result is kept per
+            worker, see worker_reports.
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.preload = tuple(preload)
+        self.setup = setup
+        self.setup_args = tuple(setup_args)
+        self.report = report
+        self._reports = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+#       spawn, not fork: the serving process runs threads, and fork would
+#       copy their locks in whatever state they are in
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=warm_worker,
+            initargs=(self.preload, self.setup, self.setup_args))
+
+    def warm(self):
+        """
+        Start every worker process now instead of on the first tasks.
+
+        Returns:
+            list: Futures that finish once the workers are up.
+        """
+        return [self._executor.submit(_ready) for _ in range(self.workers)]
+
+    def pending(self):
+        """
+        Returns:
+            int: Tasks currently queued or running.
+        """
+        with self._lock:
+            return self._pending
+
+    def worker_reports(self):
+        """
+        Latest report of every worker process, as returned with its last
+        task; workers that have not run a task yet are missing.
+
+        Returns:
+            dict: Worker process ID -> report.
+        """
+        with self._lock:
+            return dict(self._reports)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def run(self, fn, *args, block=False):
+        """
+        Run fn(*args) in a worker process and wait for its result.
+
+        Args:
+            fn (callable): Module level task function.
+            *args: Picklable arguments.
+            block (bool): Wait for a free slot instead of raising PoolBusy,
+            for callers that are already queued (background jobs).
+
+        Returns:
+            The result of fn.
+
+        Raises:
+            PoolBusy: If block is False and max_pending tasks are pending.
+        """
+        if not self._slots.acquire(blocking=block):
+            raise PoolBusy(f"{self.max_pending} report tasks already pending")
+        with self._lock:
+            self._pending += 1
+            executor = self._executor
+        try:
+            future = executor.submit(_run_task, fn, args, self.report)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            result, pid, report = future.result()
+        except BrokenProcessPool:
+#           A worker died (e.g. killed for memory); replace the pool so
+#           later tasks do not all fail with it
+            with self._lock:
+                if self._executor is executor:
+                    logger.error("Report pool broken, starting a new one")
+                    self._executor = self._new_executor()
+                    self._reports.clear()
+            raise
+        if report is not None:
+            with self._lock:
+                if self._executor is executor:
+                    self._reports[pid] = report
+        return result
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker processes, optionally after the pending tasks.
+        """
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,319 @@
+import collections
+import io
+import itertools
+import logging
+import zipfile
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+
+logger = logging.getLogger('logger')
+
+XLSX_MIMETYPE = \
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Cell colours of the revenue report
+FORMATS = {
+    'navy_blue': {'bg_color': '#0070C0', 'border': 1},
+    'green': {'bg_color': '#09991E', 'border': 1},
+    'purple': {'bg_color': '#8064A2', 'border': 1},
+    'orange': {'bg_color': '#FF9900', 'border': 1},
+    'pink': {'bg_color': '#FF8080', 'border': 1},
+    'light_blue': {'bg_color': '#DCE6F1', 'border': 1},
+    'light_green': {'bg_color': '#C4D79B', 'border': 1},
+    'light_purple': {'bg_color': '#E4DFEC', 'border': 1},
+    'light_orange': {'bg_color': '#FFFF99', 'border': 1},
+    'light_pink': {'bg_color': '#FFFFCC', 'border': 1},
+    # -ve values
+    'ng_green': {'bg_color': '#97B953', 'border': 1},
+    'ng_purple': {'bg_color': '#B1A0C7', 'border': 1},
+    'ng_orange': {'bg_color': '#FFCC66', 'border': 1},
+    'ng_pink': {'bg_color': '#FCD5B4', 'border': 1},
+    'operating_cost_title': {'bg_color': '#3366FF', 'align': 'center',
+                             'valign': 'vcenter', 'border': 1},
+}
+
+# (header, body, negative body) colours of the employee detail columns
+DETAIL_COLOURS = ('navy_blue', 'light_blue', None)
+
+# Colours of consecutive month blocks, repeating after the fourth month
+MONTH_BLOCK_COLOURS = [
+    ('green', 'light_green', 'ng_green'),
+    ('purple', 'light_purple', 'ng_purple'),
+    ('orange', 'light_orange', 'ng_orange'),
+    ('pink', 'light_pink', 'ng_pink'),
+]
+
+
+def month_blocks(columns):
+    """
+    Find the selected months of a report from its column names.
+
+    A month block is the revenue column of a month followed by its
+    "P_L_<month>" and "P_L_<month>_%" columns, so this works for month
+    names and for (year, month) labels such as "January-2024" alike.
+
+    Args:
+        columns (iterable): Monthly_MIS column names.
+
+    Returns:
+        list: Month labels in report order.
+    """
+    columns = list(columns)
+    return [col for col in columns if f"P_L_{col}" in columns]
+
+
+def mis_column_colours(columns, months):
+    """
+    Map every Monthly_MIS column to its (header, body, negative) colours.
+
+    Args:
+        columns (iterable): Monthly_MIS column names.
+        months (list): Month labels from month_blocks.
+
+    Returns:
+        list: One colour tuple per column; columns outside the month blocks
+        get the employee detail colours.
+    """
+    block_colours = {}
+    for block, month in enumerate(months):
+        colours = MONTH_BLOCK_COLOURS[block % len(MONTH_BLOCK_COLOURS)]
+        for col in (month, f"P_L_{month}", f"P_L_{month}_%"):
+            block_colours[col] = colours
+    return [block_colours.get(col, DETAIL_COLOURS) for col in columns]
+
+
+def operating_cost_row_colours(labels, months):
+    """
+    Map every Operating_Cost row to its colour.
+
+    Args:
+        labels (iterable): Row labels (first column of the transposed table).
+        months (list): Month labels from month_blocks.
+
+    Returns:
+        list: One colour name per row; expense rows are light blue and the
+        month / P_L rows take the light colour of their month block.
+    """
+    block_colours = {}
+    for block, month in enumerate(months):
+        body = MONTH_BLOCK_COLOURS[block % len(MONTH_BLOCK_COLOURS)][1]
+        block_colours[month] = block_colours[f"P_L_{month}"] = body
+    return [block_colours.get(label, DETAIL_COLOURS[1]) for label in labels]
+
+
+def _write_column(worksheet, col_num, values, cell_formats):
+    """
+    Write one DataFrame column below the header row, one call per cell.
+
+    Args:
+        worksheet (xlsxwriter.worksheet.Worksheet): Target sheet.
+        col_num (int): Column index.
+        values (pd.Series): Column values.
+        cell_formats (iterable): One format (or None) per row.
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype) and \
+            not pd.api.types.is_bool_dtype(values.dtype):
+        missing = values.isna().to_numpy()
+        for row_num, (value, is_missing, cell_format) in enumerate(
+                zip(values.tolist(), missing, cell_formats), start=1):
+            if is_missing:
+                worksheet.write_blank(row_num, col_num, None, cell_format)
+            else:
+                worksheet.write_number(row_num, col_num, value, cell_format)
+    else:
+        for row_num, (value, cell_format) in enumerate(
+                zip(values.tolist(), cell_formats), start=1):
+            if value is None or value is pd.NaT or \
+                    (isinstance(value, float) and np.isnan(value)):
+                worksheet.write_blank(row_num, col_num, None, cell_format)
+            else:
+                worksheet.write(row_num, col_num, value, cell_format)
+
+
+def _write_monthly_mis(worksheet, formats, r1, months):
+    """
+    Write the employee P&L table with its header and P&L colours.
+
+    Every column is written with its block's light colour; negative values
+    are shaded by one "< 0" conditional format per month block, so no cell
+    value is inspected in Python.
+
+    Args:
+        worksheet (xlsxwriter.worksheet.Worksheet): Monthly_MIS sheet.
+        formats (dict): Colour name -> xlsxwriter Format.
+        r1 (pd.DataFrame): Employee revenue with Profit_Loss by month.
+        months (list): Month labels from month_blocks.
+    """
+    num_rows = len(r1)
+    colours = mis_column_colours(r1.columns, months)
+    for col_num, (column, (header, body, negative)) in enumerate(
+            zip(r1.columns, colours)):
+        worksheet.write(0, col_num, column, formats.get(header))
+        _write_column(worksheet, col_num, r1[column],
+                      itertools.repeat(formats.get(body)))
+
+    if num_rows == 0:
+        return
+#   One rule per run of adjacent columns sharing a negative colour
+    col_num = 0
+    for negative, block in itertools.groupby(colours, key=lambda c: c[2]):
+        block_width = len(list(block))
+        if negative is not None:
+            worksheet.conditional_format(
+                1, col_num, num_rows, col_num + block_width - 1,
+                {'type': 'cell', 'criteria': '<', 'value': 0,
+                 'format': formats[negative]})
+        col_num += block_width
+
+
+def _write_operating_cost(worksheet, formats, r2, months):
+    """
+    Write the transposed operating-cost table below its merged title.
+
+    Args:
+        worksheet (xlsxwriter.worksheet.Worksheet): Operating_Cost sheet.
+        formats (dict): Colour name -> xlsxwriter Format.
+        r2 (pd.DataFrame): Transposed overall profit/loss data.
+        months (list): Month labels from month_blocks.
+    """
+    worksheet.merge_range('A1:B1', 'Operating Cost',
+                          formats['operating_cost_title'])
+
+    row_formats = [formats[colour] for colour in
+                   operating_cost_row_colours(r2.iloc[:, 0], months)]
+
+    for col_num, column in enumerate(r2.columns):
+        cell_formats = row_formats if col_num < 2 else [None] * len(r2)
+        _write_column(worksheet, col_num, r2[column], cell_formats)
+
+
+def write_revenue_report(r1, r2, target):
+    """
+    Write the colour-coded revenue report workbook.
+
+    Every cell is written exactly once with its column's format, and the
+    negative-value colouring is left to Excel conditional formats, so no
+    cell is read back, inspected or re-written.
+
+    Args:
+        r1 (pd.DataFrame): Employee revenue with Profit_Loss by month,
+        written to the "Monthly_MIS" sheet.
+        r2 (pd.DataFrame): Transposed overall profit/loss data, written to
+        the "Operating_Cost" sheet.
+        target (str | io.BytesIO): Output path or buffer.
+    """
+    workbook = xlsxwriter.Workbook(
+        target, {'in_memory': isinstance(target, io.BytesIO)})
+    try:
+        formats = {name: workbook.add_format(properties)
+                   for name, properties in FORMATS.items()}
+        months = month_blocks(r1.columns)
+        _write_monthly_mis(workbook.add_worksheet('Monthly_MIS'),
+                           formats, r1, months)
+        _write_operating_cost(workbook.add_worksheet('Operating_Cost'),
+                              formats, r2, months)
+    finally:
+        workbook.close()
+    logger.info("Saved and Closed Excel file")
+
+
+def write_xlsx_report(r1, r2, target):
+    """
+    Excel backend of REPORT_FORMATS: the colour-coded workbook, with the
+    operating cost transposed into a label / value column pair.
+
+    Args:
+        r1 (pd.DataFrame): Employee revenue with Profit_Loss by month.
+        r2 (pd.DataFrame): Overall profit/loss data, one row.
+        target (str | io.BytesIO): Output path or buffer.
+    """
+    write_revenue_report(r1, r2.T.reset_index(), target)
+
+
+def wire_frame(frame):
+    """
+    Prepare a report table for columnar formats (Parquet, Arrow).
+
+    Object columns can mix text and numbers (e.g. a Sheet1 column typed
+    differently from row to row), which typed formats reject, so they are
+    written as text.
+
+    Args:
+        frame (pd.DataFrame): Report table.
+
+    Returns:
+        pd.DataFrame: The table with text object columns and a plain index.
+    """
+    mixed = {col: str for col in frame.columns[frame.dtypes == object]}
+    return frame.astype(mixed).reset_index(drop=True)
+
+
+def _write_table_archive(r1, r2, target, extension, write_table,
+                         compression=zipfile.ZIP_STORED):
+    """
+    Write both report tables into one zip archive, a file per table.
+
+    Args:
+        r1 (pd.DataFrame): Employee revenue with Profit_Loss by month,
+        stored as "Monthly_MIS.<extension>".
+        r2 (pd.DataFrame): Overall profit/loss data, stored as
+        "Operating_Cost.<extension>".
+        target (str | io.BytesIO): Output path or buffer.
+        extension (str): File extension of the tables.
+        write_table (callable): Writes a DataFrame to a binary buffer.
+        compression (int): zipfile compression of the members.
+    """
+    with zipfile.ZipFile(target, 'w', compression) as archive:
+        for name, frame in (('Monthly_MIS', r1), ('Operating_Cost', r2)):
+            buffer = io.BytesIO()
+            write_table(frame, buffer)
+            archive.writestr(f"{name}.{extension}", buffer.getvalue())
+    logger.info(f"Saved {extension} report archive")
+
+
+def write_csv_report(r1, r2, target):
+    """
+    CSV backend of REPORT_FORMATS (zip of two CSV files).
+    """
+    _write_table_archive(
+        r1, r2, target, 'csv',
+        lambda frame, buffer: frame.to_csv(buffer, index=False),
+        zipfile.ZIP_DEFLATED)
+
+
+def write_parquet_report(r1, r2, target):
+    """
+    Parquet backend of REPORT_FORMATS (zip of two Parquet files); needs
+    pyarrow or fastparquet.
+    """
+    _write_table_archive(
+        r1, r2, target, 'parquet',
+        lambda frame, buffer: wire_frame(frame).to_parquet(buffer, index=False))
+
+
+def write_arrow_report(r1, r2, target):
+    """
+    Arrow backend of REPORT_FORMATS (zip of two Arrow IPC / Feather v2
+    files); needs pyarrow.
+    """
+    _write_table_archive(
+        r1, r2, target, 'arrow',
+        lambda frame, buffer: wire_frame(frame).to_feather(buffer))
+
+
+ReportFormat = collections.namedtuple(
+    'ReportFormat', ['write', 'download_name', 'mimetype'])
+
+# Output format -> report backend; every writer takes (r1, r2, target) with
+# r2 as the one-row operating-cost table
+REPORT_FORMATS = {
+    'xlsx': ReportFormat(write_xlsx_report, 'revenue.xlsx', XLSX_MIMETYPE),
+    'csv': ReportFormat(write_csv_report, 'revenue_csv.zip', 'application/zip'),
+    'parquet': ReportFormat(write_parquet_report, 'revenue_parquet.zip',
+                            'application/zip'),
+    'arrow': ReportFormat(write_arrow_report, 'revenue_arrow.zip',
+                          'application/zip'),
+}
@@ -6,6 +6,8 @@ const checkboxes = document.querySelectorAll("input[type=checkbox][name=month]")
 let selectedMonths = [];
 let selcetedFile;
 let selectedTags = "";
+// How often a queued report job is polled
+const JOB_POLL_INTERVAL_MS = 2000;
 dropdownLabelTextEl.innerText = dropdownLabelPlaceHolder;
 
 function onGenerateRevenue() {
@@ -29,6 +31,16 @@ function onGenerateRevenue() {
     var formdata = new FormData();
     formdata.append("months", selectedTags);
     formdata.append("file", fileInput.files[0]);
+    // Sheet2 expenses, needed when the data file is a CSV / Parquet export
+    const expensesInput = document.getElementById('expenses');
+    if (expensesInput.files[0]) {
+        formdata.append("expenses", expensesInput.files[0]);
+    }
+    // Optional (year, month) window, e.g. a rolling 24-month forecast
+    formdata.append("period_start", document.getElementById('period-start').value);
+    formdata.append("period_end", document.getElementById('period-end').value);
+    formdata.append("output_format", document.getElementById('output-format').value);
+    let downloadName = 'Result.xlsx';
 
     var requestOptions = {
       method: 'POST',
@@ -37,10 +49,33 @@ function onGenerateRevenue() {
     };
     
 
-    fetch("/process", requestOptions)
+    // Queue the report as a background job, poll it until it has finished
+    // and then download it, so long runs never hold one request open
+    const generateButton = document.getElementById('generate');
+    generateButton.disabled = true;
+    // A zip of entity workbooks is run as one batch job
+    const isBatch = fileInput.files[0].name.toLowerCase().endsWith('.zip');
+    fetch(isBatch ? "/batch" : "/jobs", requestOptions)
+        .then(response => {
+            if (response.status === 202) {
+                return response.json();
+            }
+            return response.text().then(errorMessage => {
+                alert(errorMessage);
+                throw new Error(errorMessage);
+            });
+        })
+        .then(job => waitForJob(job))
+        .then(job => fetch(job.result_url))
         .then(response => {
             if (response.status === 200) {
                 alert("Click on ok to download the file")
+                // Keep the server's file name, e.g. revenue_parquet.zip
+                const disposition = response.headers.get('Content-Disposition') || '';
+                const match = disposition.match(/filename="?([^";]+)"?/);
+                if (match) {
+                    downloadName = match[1];
+                }
                 return response.blob();
             } else {
                 //throw new Error(`HTTP status ${response.status}`);
@@ -56,10 +91,9 @@ function onGenerateRevenue() {
             }
         })
         .then(result => {
-            var contentType = 'application/vnd.ms-excel';
             var downloadLink = window.document.createElement('a');
-            downloadLink.href = window.URL.createObjectURL(new Blob([result], { type: contentType }));
-            downloadLink.download = 'Result.xlsx';
+            downloadLink.href = window.URL.createObjectURL(result);
+            downloadLink.download = downloadName;
             document.body.appendChild(downloadLink);
             downloadLink.click();
             document.body.removeChild(downloadLink);
@@ -70,9 +104,47 @@ function onGenerateRevenue() {
             // Handle the error here, e.g., display a message to the user.
             //window.location.href = "templates/error.html";
             //window.location.href = `templates/error.html?message=${encodeURIComponent(errorMessage)}`;
+        })
+        .finally(() => {
+            generateButton.disabled = false;
         });
 }
 
+function waitForJob(job) {
+    // Resolves with the job once it is done or failed; the result URL then
+    // serves the report or the error message. Rejects if the status request
+    // itself fails, e.g. 404 for a job the server no longer knows
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch(job.status_url)
+                .then(response => {
+                    if (response.ok) {
+                        return response.json();
+                    }
+                    return response.text().then(body => {
+                        let errorMessage = body || `HTTP status ${response.status}`;
+                        try {
+                            errorMessage = JSON.parse(body).error || errorMessage;
+                        } catch (e) {
+                            // Not a JSON error document, show the text as is
+                        }
+                        alert(errorMessage);
+                        throw new Error(errorMessage);
+                    });
+                })
+                .then(status => {
+                    if (status.status === 'done' || status.status === 'failed') {
+                        resolve(job);
+                    } else {
+                        setTimeout(poll, JOB_POLL_INTERVAL_MS);
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
 function onMonthDropdown() {
     const dropdownIcon = document.getElementById('dropdown-icon');
     const dropdownList =  document.getElementById("dropdown-value");
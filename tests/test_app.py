@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from main11 import create_app, report_services
+
+
+SAMPLE_WORKBOOK = os.path.join(os.path.dirname(__file__), os.pardir, 'Input',
+                               'Input_demo_review.xlsx')
+
+
+@pytest.fixture
+def make_app():
+    apps = []
+
+    def make(**config):
+        app = create_app({'REPORT_PROCESSES': 0, **config})
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        report_services(app).job_queue.shutdown()
+
+
+def test_apps_do_not_share_config_or_jobs(make_app):
+    first = make_app(JOB_WORKERS=1)
+    second = make_app(JOB_WORKERS=3)
+    assert first is not second
+    assert (first.config['JOB_WORKERS'], second.config['JOB_WORKERS']) == (1, 3)
+    assert report_services(first).job_queue is not \
+        report_services(second).job_queue
+
+    with open(SAMPLE_WORKBOOK, 'rb') as f:
+        response = first.test_client().post('/jobs', data={
+            'file': (f, 'Input_demo_review.xlsx'), 'months': 'January'})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    assert first.test_client().get(f'/jobs/{job_id}').status_code == 200
+    assert second.test_client().get(f'/jobs/{job_id}').status_code == 404
@@ -0,0 +1,34 @@
+import threading
+
+from revenue_core import run_batch
+
+
+class RecordingPool:
+    """
+    Stands in for a ReportPool: runs tasks on the calling thread.
+    """
+
+    workers = 2
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def run(self, fn, *args, block=False):
+        with self._lock:
+            self.calls.append((args[0][0], block))
+        return fn(*args)
+
+
+def name_task(entity, suffix):
+    return entity[0] + suffix
+
+
+def test_batch_runs_in_the_shared_pool():
+    pool = RecordingPool()
+    entities = [(f'entity{i}.xlsx', b'') for i in range(5)]
+
+    results = run_batch(name_task, entities, '!', pool=pool)
+
+    assert results == [f'entity{i}.xlsx!' for i in range(5)]
+    assert sorted(pool.calls) == [(name, True) for name, _ in entities]
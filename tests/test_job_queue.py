@@ -0,0 +1,164 @@
+import pickle
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from job_queue import (DONE, QUEUED, RUNNING, JobQueue, MemoryJobStore,
+                       SQLiteJobStore)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def stores(request, tmp_path):
+    """
+    Two views of one job store, as two processes sharing it see it.
+    """
+    if request.param == 'memory':
+        store = MemoryJobStore()
+        return store, store
+    path = str(tmp_path / 'jobs.sqlite3')
+    return SQLiteJobStore(path), SQLiteJobStore(path)
+
+
+def wait_for(queue, job_id, status=DONE, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job['status'] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} never got {status}: {job}")
+
+
+def test_live_lease_is_not_claimed(stores):
+    first, second = stores
+    now = time.time()
+    first.create('job', 'payload', 'a', now + 60)
+    assert first.start('job', 'a', now + 60)
+
+    assert second.claim_expired('b', now, now + 60) == []
+    assert second.get('job')['owner'] == 'a'
+
+
+def test_expired_lease_is_taken_over_once(stores):
+    first, second = stores
+    now = time.time()
+    first.create('job', 'payload', 'a', now - 10)
+    assert first.start('job', 'a', now - 1)
+
+    assert second.claim_expired('b', now, now + 60) == ['job']
+    assert first.claim_expired('c', now, now + 60) == []
+    job = second.get('job')
+    assert (job['status'], job['owner']) == (QUEUED, 'b')
+
+
+def test_result_is_dropped_after_takeover(stores):
+    first, second = stores
+    now = time.time()
+    first.create('job', 'payload', 'a', now - 10)
+    first.start('job', 'a', now - 1)
+    second.claim_expired('b', now, now + 60)
+
+#   The old owner can neither start nor finish the job any more
+    assert not first.start('job', 'a', now + 60)
+    assert not first.finish('job', 'a', status=DONE, result=b'stale')
+    assert second.get('job')['result'] is None
+
+    assert second.start('job', 'b', now + 60)
+    assert second.finish('job', 'b', status=DONE, result=b'fresh')
+    assert second.get('job')['result'] == b'fresh'
+
+
+def test_released_jobs_are_claimed_at_once(stores):
+    first, second = stores
+    now = time.time()
+    first.create('job', 'payload', 'a', now + 60)
+    first.release('a')
+
+    assert second.claim_expired('b', now, now + 60) == ['job']
+
+
+def test_queue_runs_jobs_of_a_dead_queue(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    store = SQLiteJobStore(path)
+    now = time.time()
+    store.create('job', 'payload', 'dead', now - 10)
+    store.start('job', 'dead', now - 1)
+
+    queue = JobQueue(lambda payload: (payload.encode(), 'report.txt',
+                                      'text/plain'),
+                     SQLiteJobStore(path), lease=1)
+    try:
+        assert queue.recover() == 1
+        wait_for(queue, 'job')
+        assert queue.result('job')['result'] == b'payload'
+    finally:
+        queue.shutdown()
+
+
+def test_stopped_queue_hands_running_job_over(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    release = threading.Event()
+
+    def slow_runner(payload):
+        release.wait(5)
+        return b'stale', 'report.txt', 'text/plain'
+
+    old = JobQueue(slow_runner, SQLiteJobStore(path), lease=30)
+    new = JobQueue(lambda payload: (b'fresh', 'report.txt', 'text/plain'),
+                   SQLiteJobStore(path), lease=30)
+    try:
+        job_id = old.submit('payload')
+        wait_for(old, job_id, RUNNING)
+#       A stopping worker releases its leases; another one takes over
+        old.shutdown(wait=False)
+        assert new.recover() == 1
+        wait_for(new, job_id)
+
+        release.set()
+        time.sleep(0.2)
+        assert new.result(job_id)['result'] == b'fresh'
+    finally:
+        release.set()
+        new.shutdown()
+
+
+def test_heartbeat_keeps_a_long_job_leased(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    release = threading.Event()
+
+    def slow_runner(payload):
+        release.wait(5)
+        return b'done', 'report.txt', 'text/plain'
+
+    queue = JobQueue(slow_runner, SQLiteJobStore(path), lease=0.3)
+    try:
+        job_id = queue.submit('payload')
+        wait_for(queue, job_id, RUNNING)
+        time.sleep(1)
+#       Well past the lease, yet still owned by the running queue
+        assert SQLiteJobStore(path).claim_expired(
+            'other', time.time(), time.time() + 30) == []
+        release.set()
+        wait_for(queue, job_id)
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_database_without_lease_columns_is_upgraded(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE jobs (job_id TEXT PRIMARY KEY, status TEXT, "
+            "payload BLOB, error TEXT, error_status INTEGER, created REAL, "
+            "updated REAL, download_name TEXT, mimetype TEXT, result BLOB)")
+        connection.execute(
+            "INSERT INTO jobs (job_id, status, payload, created, updated) "
+            "VALUES ('job', ?, ?, 1, 1)", (RUNNING, pickle.dumps('payload')))
+    connection.close()
+
+    store = SQLiteJobStore(path)
+    assert store.claim_expired('a', time.time(), time.time() + 60) == ['job']
+    assert store.get('job')['payload'] == 'payload'
@@ -0,0 +1,95 @@
+import os
+import warnings
+
+import pandas as pd
+import pytest
+
+from revenue_core import (MONTHS, get_employee_data_by_months,
+                          get_full_year_tables, process_data, select_months)
+from revenue_core.loader import read_input_workbook
+
+
+SAMPLE_WORKBOOK = os.path.join(os.path.dirname(__file__), os.pardir, 'Input',
+                               'Input_demo_review.xlsx')
+
+MONTH_SELECTIONS = [
+    ['January'],
+    ['January', 'February', 'March'],
+    ['December', 'January', 'May', 'June', 'July', 'August', 'September'],
+    MONTHS,
+]
+
+
+def apply_month_table(grouped_df, months):
+    """
+    The Monthly_MIS month columns as get_employee_data_by_months built them
+    before the NumPy P&L: one frame per month with a row-wise apply for the
+    P&L %, concatenated, then parsed back from the bracket-stripped strings.
+    """
+    dataframes = []
+    with warnings.catch_warnings(), \
+            pd.option_context('mode.chained_assignment', None):
+        warnings.simplefilter('ignore')
+        for i in months:
+            columns_to_fetch = ['Emp_ID', 'Name', 'Month_sal',
+                                'Project', 'PO_No', 'Proj_start', 'Proj_end'] + [i]
+            employee_data_month = grouped_df[columns_to_fetch]
+
+            employee_data_month[f"P_L_{i}"] = employee_data_month[i] - \
+                employee_data_month['Month_sal']
+            employee_data_month[f"P_L_{i}_%"] = employee_data_month.apply(lambda row:
+                                                                          ((row[i] - row['Month_sal']) / row[i] * 100)
+                                                                          if row[i] > 0 else 0, axis=1)
+
+            employee_data_month = employee_data_month.round(2)
+            dataframes.append(employee_data_month)
+
+        result_df = pd.concat(dataframes, axis=1).loc[:, ~pd.concat(
+            dataframes, axis=1).columns.duplicated()]
+
+        for col in result_df.columns:
+            result_df[col] = result_df[col].apply(lambda x: str(
+                x).replace('[', '').replace(']', '').replace("'", ""))
+
+        for col in result_df.columns[7:]:
+            result_df[col] = pd.to_numeric(
+                result_df[col], errors='coerce').astype(float).round(2)
+    return result_df[result_df.columns[7:]]
+
+
+@pytest.fixture(scope='module')
+def sample():
+    sheets = read_input_workbook(SAMPLE_WORKBOOK)
+    return process_data(sheets), sheets
+
+
+@pytest.mark.parametrize('months', MONTH_SELECTIONS)
+def test_month_columns_match_apply_reference(sample, months):
+    grouped_df, sheets = sample
+    result_df, _ = get_employee_data_by_months(grouped_df, months, sheets)
+    expected = apply_month_table(grouped_df, months)
+
+    pd.testing.assert_frame_equal(result_df[expected.columns], expected,
+                                  check_dtype=False)
+    assert list(result_df.columns[7:]) == list(expected.columns)
+
+
+@pytest.mark.parametrize('months', MONTH_SELECTIONS)
+def test_full_year_slice_matches_direct_build(sample, months):
+    grouped_df, sheets = sample
+    direct = get_employee_data_by_months(grouped_df, months, sheets)
+    sliced = select_months(get_full_year_tables(grouped_df, sheets), months)
+
+    for expected, actual in zip(direct, sliced):
+        pd.testing.assert_frame_equal(actual.reset_index(drop=True),
+                                      expected.reset_index(drop=True))
+
+
+def test_repeated_month_is_reported_once(sample):
+    grouped_df, sheets = sample
+    result_df, _ = get_employee_data_by_months(
+        grouped_df, ['March', 'March', 'April'], sheets)
+
+    assert list(result_df.columns[7:]) == [
+        'March', 'P_L_March', 'P_L_March_%',
+        'April', 'P_L_April', 'P_L_April_%']
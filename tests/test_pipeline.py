@@ -0,0 +1,97 @@
+import os
+
+import pandas as pd
+import pytest
+
+from revenue_core import (MONTHS, InvalidWindowError, MissingSheetError,
+                          entity_report_task, get_employee_data_by_months,
+                          process_data)
+from revenue_core.loader import read_input_workbook
+
+
+INPUT_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'Input')
+
+
+@pytest.fixture(scope='module')
+def expenses():
+    return read_input_workbook(os.path.join(INPUT_DIR, 'Input_demo_review.xlsx'),
+                               ('Sheet2',))['Sheet2']
+
+
+@pytest.fixture(scope='module')
+def multi_salary(expenses):
+#   new1.xlsx has no Sheet2; employee 103 is paid 26000 on one project and
+#   25000 on another
+    sheet1 = read_input_workbook(os.path.join(INPUT_DIR, 'new1.xlsx'),
+                                 ('Sheet1',))['Sheet1']
+    sheets = {'Sheet1': sheet1, 'Sheet2': expenses}
+    return get_employee_data_by_months(process_data(sheets), MONTHS, sheets)
+
+
+def test_multi_salary_employee_keeps_numeric_salary(multi_salary):
+    result_df, _ = multi_salary
+    jane = result_df.set_index('Emp_ID').loc[103]
+
+    assert pd.api.types.is_float_dtype(result_df['Month_sal'])
+    assert jane['Month_sal'] == 26000
+    assert jane['P_L_March'] == pytest.approx(jane['March'] - 26000)
+
+
+def test_operating_cost_sums_every_salary(multi_salary, expenses):
+    result_df, operating_cost = multi_salary
+
+    assert result_df['Month_sal'].notna().all()
+    assert operating_cost['Month_sal'].iloc[0] == 446000
+    assert operating_cost['Total_Expenses'].iloc[0] == \
+        446000 + expenses.iloc[0].sum()
+
+
+@pytest.mark.parametrize('source', ['dict', 'path'])
+def test_missing_sheet2_raises_typed_error(source):
+    path = os.path.join(INPUT_DIR, 'new1.xlsx')
+    sheets = read_input_workbook(path)
+    grouped_df = process_data(sheets)
+
+    with pytest.raises(MissingSheetError, match='Sheet2'):
+        get_employee_data_by_months(
+            grouped_df, MONTHS, sheets if source == 'dict' else path)
+
+
+def test_duplicate_employee_project_pairs_are_summed_once():
+#   Two allocations of employee 105 on Project D: the whole year at 80000 a
+#   month and an extra 40000 a month for February and March
+    sheet1 = read_input_workbook(os.path.join(INPUT_DIR, 'new1.xlsx'),
+                                 ('Sheet1',))['Sheet1']
+    first = sheet1[sheet1['Emp_ID'] == 105]
+    second = first.assign(Proj_start=pd.Timestamp('2023-02-01'),
+                          Proj_end=pd.Timestamp('2023-03-31'),
+                          Rate_per_month=40000)
+
+    def revenue(*allocations):
+        grouped_df = process_data(
+            {'Sheet1': pd.concat(allocations, ignore_index=True)})
+        assert len(grouped_df) == 1
+        return grouped_df.iloc[0][MONTHS].astype(float)
+
+    both = revenue(first, second)
+    pd.testing.assert_series_equal(both, revenue(first) + revenue(second))
+    assert both['February'] == 120000
+    assert both['April'] == 80000
+
+
+@pytest.mark.parametrize('window', [('2024-05', '2024-01'),
+                                    ('garbage', None)])
+def test_bad_reporting_window_is_named(window):
+    path = os.path.join(INPUT_DIR, 'new1.xlsx')
+
+    with pytest.raises(InvalidWindowError, match=f'window {window[0]}'):
+        process_data(path, *window)
+
+
+def test_legacy_xls_upload_is_rejected():
+    status, message, _ = entity_report_task(
+        ('allocations.xls', b'\xd0\xcf\x11\xe0'), None, {'months': 'January'},
+        'xlsx')
+
+    assert status == 400
+    assert b'.xls' in message
@@ -0,0 +1,35 @@
+"""
+Production entry point, e.g.
+
+    gunicorn wsgi:app
+
+gunicorn picks up gunicorn.conf.py from the working directory, which
+preloads this module in the master process and forks the workers from it.
+Settings come from FLASK_<NAME> environment variables, see create_app.
+"""
+import gc
+import os
+
+# Import the heavy libraries before the workers are forked so their pages
+# are shared copy-on-write instead of loaded again by every worker
+import numpy
+import openpyxl
+import pandas
+import xlsxwriter
+
+from main11 import create_app
+
+
+# The job queue holds threads and a SQLite connection and the report pool
+# holds processes, so every worker starts its own after the fork (post_fork
+# in gunicorn.conf.py)
+app = create_app(start_workers=False)
+# Workers do not share memory, so job records must live in a file for a
+# job to be polled through any worker
+if not app.config['JOB_DATABASE']:
+    app.config['JOB_DATABASE'] = os.path.join('logs', 'jobs.sqlite3')
+
+# Move everything imported so far out of the collector's reach: a
+# collection in a worker would otherwise write to (and un-share) the pages
+# of these objects
+gc.freeze()